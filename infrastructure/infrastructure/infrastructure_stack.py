@@ -5,13 +5,19 @@ from aws_cdk import (
     RemovalPolicy,
     CfnOutput,
     Size,
+    BundlingOptions,
     aws_s3 as s3,
     aws_dynamodb as dynamodb,
     aws_lambda as lambda_,
+    aws_ecr_assets as ecr_assets,
     aws_iam as iam,
     aws_apigateway as apigateway,
     aws_logs as logs,
     aws_s3_notifications as s3n,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_stepfunctions as sfn,
+    aws_stepfunctions_tasks as tasks,
 )
 from constructs import Construct
 
@@ -32,6 +38,12 @@ class InfrastructureStack(Stack):
         speech_ds_id = self.node.try_get_context("speech_ds_id") or os.getenv("SPEECH_DS_ID")
         caption_ds_id = self.node.try_get_context("caption_ds_id") or os.getenv("CAPTION_DS_ID")
         agentcore_api_url = self.node.try_get_context("agentcore_api_url") or os.getenv("AGENTCORE_API_URL")
+        # Opt-in: package extract_frames as an arm64 container image with its own FFmpeg build
+        extract_frames_container = str(
+            self.node.try_get_context("extract_frames_container") or os.getenv("EXTRACT_FRAMES_CONTAINER", "false")
+        ).lower() == "true"
+        # Titan Multimodal output length (256, 384 or 1024); must match the image vector index
+        embedding_dimension = self.node.try_get_context("embedding_dimension") or os.getenv("EMBEDDING_DIMENSION")
         
         if not all([speech_kb_id, caption_kb_id]):
             print("⚠️  Warning: Knowledge Base IDs not configured. Set via cdk.context.json or environment variables.")
@@ -94,6 +106,41 @@ class InfrastructureStack(Stack):
             projection_type=dynamodb.ProjectionType.ALL
         )
         
+        # list_videos: newest-first listing per status without scanning the table
+        self.video_table.add_global_secondary_index(
+            index_name="status-upload_timestamp-index",
+            partition_key=dynamodb.Attribute(
+                name="status",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="upload_timestamp",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=[
+                "title", "duration_seconds", "frame_count",
+                "s3_bucket", "s3_key", "processing_cost_estimate"
+            ]
+        )
+        
+        # Frame captions: one item per frame (keeps the video item small)
+        self.captions_table = dynamodb.Table(
+            self,
+            "FrameCaptionsTable",
+            table_name=f"{project_name}-frame-captions",
+            partition_key=dynamodb.Attribute(
+                name="video_id",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="frame_number",
+                type=dynamodb.AttributeType.NUMBER
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+        
         # ======================
         # IAM ROLE FOR LAMBDAS
         # ======================
@@ -114,6 +161,7 @@ class InfrastructureStack(Stack):
         
         # Grant DynamoDB permissions
         self.video_table.grant_read_write_data(lambda_role)
+        self.captions_table.grant_read_write_data(lambda_role)
         
         # Grant Transcribe permissions
         lambda_role.add_to_policy(iam.PolicyStatement(
@@ -173,6 +221,7 @@ class InfrastructureStack(Stack):
             "RAW_BUCKET": self.raw_bucket.bucket_name,
             "PROCESSED_BUCKET": self.processed_bucket.bucket_name,
             "VIDEO_TABLE": self.video_table.table_name,
+            "CAPTIONS_TABLE": self.captions_table.table_name,
             "REGION": region,
         }
         
@@ -186,6 +235,8 @@ class InfrastructureStack(Stack):
             common_env["CAPTION_DS_ID"] = caption_ds_id
         if agentcore_api_url:
             common_env["AGENTCORE_API_URL"] = agentcore_api_url
+        if embedding_dimension:
+            common_env["EMBEDDING_DIMENSION"] = str(embedding_dimension)
         
         # ======================
         # LAMBDA FUNCTIONS
@@ -193,6 +244,30 @@ class InfrastructureStack(Stack):
         # Path to Lambda source code
         lambda_code_path = "../src/lambdas"
         
+        # Third-party packages (orjson, ijson, cbor2, ...) from requirements.txt, installed
+        # by CDK at synth time; every zip-packaged function attaches this layer
+        self.dependencies_layer = lambda_.LayerVersion(
+            self,
+            "LambdaDependenciesLayer",
+            layer_version_name=f"{project_name}-dependencies",
+            code=lambda_.Code.from_asset(
+                lambda_code_path,
+                # Only requirements.txt feeds the bundle, so code edits don't rebuild the layer
+                exclude=["*", "!requirements.txt"],
+                bundling=BundlingOptions(
+                    image=lambda_.Runtime.PYTHON_3_11.bundling_image,
+                    platform="linux/amd64",
+                    command=[
+                        "bash", "-c",
+                        "pip install --no-cache-dir -r requirements.txt -t /asset-output/python"
+                    ],
+                ),
+            ),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_11],
+            compatible_architectures=[lambda_.Architecture.X86_64],
+        )
+        dependencies_layer = self.dependencies_layer
+        
         # 1. Process Video (orchestrator)
         process_video_fn = lambda_.Function(
             self,
@@ -201,6 +276,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="process_video.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(300),
             memory_size=512,
@@ -216,6 +292,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="check_transcription.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(60),
             memory_size=256,
@@ -228,17 +305,13 @@ class InfrastructureStack(Stack):
         )
         
         # 3. Extract Frames
-        extract_frames_fn = lambda_.Function(
-            self,
-            "ExtractFramesFunction",
+        extract_frames_props = dict(
             function_name=f"{project_name}-extract-frames",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="extract_frames.handler",
-            code=lambda_.Code.from_asset(lambda_code_path),
             role=lambda_role,
             timeout=Duration.seconds(600),
-            memory_size=2048,
-            ephemeral_storage_size=Size.mebibytes(2048),
+            # More memory also raises network bandwidth for the parallel video download
+            memory_size=3008,
+            ephemeral_storage_size=Size.mebibytes(4096),
             environment={
                 **common_env,
                 "MAX_FRAMES": "120",
@@ -246,6 +319,31 @@ class InfrastructureStack(Stack):
             },
             log_retention=logs.RetentionDays.TWO_YEARS,
         )
+        if extract_frames_container:
+            # Container image (src/lambdas/Dockerfile) on Graviton: FFmpeg in the image
+            # instead of the generic static binary in the zip
+            extract_frames_fn = lambda_.DockerImageFunction(
+                self,
+                "ExtractFramesFunction",
+                code=lambda_.DockerImageCode.from_image_asset(
+                    lambda_code_path,
+                    cmd=["extract_frames.handler"],
+                    # Match the function architecture (and the Dockerfile's TARGETARCH)
+                    platform=ecr_assets.Platform.LINUX_ARM64,
+                ),
+                architecture=lambda_.Architecture.ARM_64,
+                **extract_frames_props,
+            )
+        else:
+            extract_frames_fn = lambda_.Function(
+                self,
+                "ExtractFramesFunction",
+                runtime=lambda_.Runtime.PYTHON_3_11,
+                handler="extract_frames.handler",
+                code=lambda_.Code.from_asset(lambda_code_path),
+                layers=[dependencies_layer],
+                **extract_frames_props,
+            )
         
         # 4. Generate Captions
         generate_captions_fn = lambda_.Function(
@@ -255,6 +353,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="generate_captions.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(900),
             memory_size=1024,
@@ -265,6 +364,54 @@ class InfrastructureStack(Stack):
             log_retention=logs.RetentionDays.TWO_YEARS,
         )
         
+        # 4a. Caption Frame (frame pipeline Map worker, one frame per invocation)
+        caption_frame_fn = lambda_.Function(
+            self,
+            "CaptionFrameFunction",
+            function_name=f"{project_name}-caption-frame",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="generate_captions.caption_frame_handler",
+            code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
+            role=lambda_role,
+            timeout=Duration.seconds(15),
+            memory_size=1024,
+            environment={
+                **common_env,
+                # Read by generate_captions (inference profile, same as its default)
+                "BEDROCK_VISION_MODEL": "us.anthropic.claude-3-5-sonnet-20241022-v2:0",
+                # Single Converse attempt per invocation: throttling and transient
+                # errors are retried by the state machine, not inside the 15s timeout
+                "MAX_THROTTLE_RETRIES": "0"
+            },
+            log_retention=logs.RetentionDays.TWO_YEARS,
+        )
+        
+        # The Map fans out a burst of invocations; a provisioned alias avoids cold starts
+        caption_frame_alias = lambda_.Alias(
+            self,
+            "CaptionFrameLiveAlias",
+            alias_name="live",
+            version=caption_frame_fn.current_version,
+            provisioned_concurrent_executions=5,
+        )
+        
+        # 4b. Reduce Captions (frame pipeline: record captions, trigger embedding)
+        reduce_captions_fn = lambda_.Function(
+            self,
+            "ReduceCaptionsFunction",
+            function_name=f"{project_name}-reduce-captions",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="generate_captions.reduce_captions_handler",
+            code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
+            role=lambda_role,
+            timeout=Duration.seconds(60),
+            memory_size=512,
+            environment=common_env,
+            log_retention=logs.RetentionDays.TWO_YEARS,
+        )
+        
         # 5. Chunk Transcript
         chunk_transcript_fn = lambda_.Function(
             self,
@@ -273,6 +420,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="chunk_transcript.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(300),
             memory_size=512,
@@ -288,6 +436,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="embed_captions.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(300),
             memory_size=512,
@@ -303,6 +452,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="embed_and_index_images.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(600),
             memory_size=1024,
@@ -321,6 +471,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="search_images.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(30),
             memory_size=512,
@@ -344,6 +495,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="get_upload_url.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(30),
             memory_size=256,
@@ -358,6 +510,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="upload_video.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(30),
             memory_size=256,
@@ -372,6 +525,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="delete_video.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(60),
             memory_size=256,
@@ -387,6 +541,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="agent_api.handler",
             code=lambda_.Code.from_asset(lambda_code_path),
+            layers=[dependencies_layer],
             role=lambda_role,
             timeout=Duration.seconds(60),
             memory_size=512,
@@ -397,6 +552,112 @@ class InfrastructureStack(Stack):
             log_retention=logs.RetentionDays.TWO_YEARS,
         )
         
+        # ======================
+        # FRAME PIPELINE (STEP FUNCTIONS)
+        # ======================
+        # ExtractFrames -> Map(CaptionFrame, max 10 concurrent) -> ReduceCaptions
+        # STANDARD type: frame extraction can run past the 5 minute Express limit
+        frame_pipeline_name = f"{project_name}-frame-pipeline"
+        
+        extract_frames_task = tasks.LambdaInvoke(
+            self,
+            "ExtractFrames",
+            lambda_function=extract_frames_fn,
+            result_selector={
+                "frames": sfn.JsonPath.string_to_json(sfn.JsonPath.string_at("$.Payload.body"))
+            },
+            result_path="$.extract",
+        )
+        
+        caption_frame_task = tasks.LambdaInvoke(
+            self,
+            "CaptionFrame",
+            lambda_function=caption_frame_alias,
+            payload_response_only=True,
+        )
+        caption_frame_task.add_retry(
+            errors=[sfn.Errors.ALL],
+            interval=Duration.seconds(2),
+            backoff_rate=2,
+            max_attempts=4,
+        )
+        # A failed frame must not fail the video; ReduceCaptions skips entries without a caption
+        caption_frame_task.add_catch(
+            sfn.Pass(self, "CaptionFrameFailed"),
+            result_path="$.error",
+        )
+        
+        caption_frames_map = sfn.Map(
+            self,
+            "CaptionFrames",
+            items_path="$.extract.frames.frame_keys",
+            max_concurrency=10,
+            item_selector={
+                "video_id": sfn.JsonPath.string_at("$.extract.frames.video_id"),
+                "title": sfn.JsonPath.string_at("$.extract.frames.title"),
+                "duration_seconds": sfn.JsonPath.number_at("$.extract.frames.duration_seconds"),
+                "frame_count": sfn.JsonPath.number_at("$.extract.frames.frame_count"),
+                "frame_key": sfn.JsonPath.string_at("$$.Map.Item.Value"),
+            },
+            result_path="$.captions",
+        )
+        caption_frames_map.item_processor(caption_frame_task)
+        
+        reduce_captions_task = tasks.LambdaInvoke(
+            self,
+            "ReduceCaptions",
+            lambda_function=reduce_captions_fn,
+            payload=sfn.TaskInput.from_object({
+                "video_id": sfn.JsonPath.string_at("$.extract.frames.video_id"),
+                "frames_s3_prefix": sfn.JsonPath.string_at("$.extract.frames.frames_s3_prefix"),
+                "captions": sfn.JsonPath.list_at("$.captions"),
+            }),
+            payload_response_only=True,
+        )
+        
+        frame_pipeline = sfn.StateMachine(
+            self,
+            "FramePipelineStateMachine",
+            state_machine_name=frame_pipeline_name,
+            state_machine_type=sfn.StateMachineType.STANDARD,
+            definition_body=sfn.DefinitionBody.from_chainable(
+                extract_frames_task.next(caption_frames_map).next(reduce_captions_task)
+            ),
+            timeout=Duration.hours(1),
+        )
+        
+        # ======================
+        # INGEST EVENTS
+        # ======================
+        # process_video publishes one VideoUploaded event per new video; rules fan it
+        # out to the frame pipeline and the check_transcription poller
+        ingest_event_source = f"{project_name}.ingest"
+        events.EventBus.grant_all_put_events(lambda_role)
+        process_video_fn.add_environment("INGEST_EVENT_SOURCE", ingest_event_source)
+        video_uploaded_rule = events.Rule(
+            self,
+            "VideoUploadedRule",
+            rule_name=f"{project_name}-video-uploaded",
+            event_pattern=events.EventPattern(
+                source=[ingest_event_source],
+                detail_type=["VideoUploaded"],
+            ),
+        )
+        video_uploaded_rule.add_target(targets.SfnStateMachine(
+            frame_pipeline,
+            input=events.RuleTargetInput.from_object({
+                "video_id": events.EventField.from_path("$.detail.video_id"),
+            }),
+        ))
+        video_uploaded_rule.add_target(targets.LambdaFunction(
+            check_transcription_fn,
+            event=events.RuleTargetInput.from_object({
+                "video_id": events.EventField.from_path("$.detail.video_id"),
+                "transcribe_job_name": events.EventField.from_path("$.detail.transcribe_job_name"),
+                "attempt": 1,
+            }),
+        ))
+        
         # ======================
         # S3 TRIGGERS
         # ======================
@@ -407,6 +668,20 @@ class InfrastructureStack(Stack):
             s3.NotificationKeyFilter(suffix=".mp4")
         )
         
+        # ======================
+        # WARMUP
+        # ======================
+        # Ping the frame/caption pipeline so chained invocations hit warm containers
+        warmup_rule = events.Rule(
+            self,
+            "PipelineWarmupRule",
+            rule_name=f"{project_name}-pipeline-warmup",
+            schedule=events.Schedule.rate(Duration.minutes(4)),
+        )
+        warmup_input = events.RuleTargetInput.from_object({"warmup": True})
+        for warmup_target in [extract_frames_fn, caption_frame_alias, embed_captions_fn]:
+            warmup_rule.add_target(targets.LambdaFunction(warmup_target, event=warmup_input))
+        
         # ======================
         # API GATEWAY
         # ======================
@@ -496,6 +771,7 @@ class InfrastructureStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler=f"tools/{handler_file}.handler",
             code=lambda_.Code.from_asset("../src/lambdas"),
+            layers=[self.dependencies_layer],
             role=role,
             timeout=Duration.seconds(30),
             memory_size=512,
@@ -0,0 +1,23 @@
+"""
+Shared botocore client configuration for the Lambda handlers.
+
+TCP keep-alive lets pooled connections survive across warm invocations
+(no re-handshake per call). botocore is imported on first use so handlers
+that create their clients lazily keep a small cold-start import footprint.
+"""
+
+from typing import Any
+
+CLIENT_DEFAULTS = {
+    'tcp_keepalive': True,
+    'max_pool_connections': 16,
+    'connect_timeout': 2,
+    'read_timeout': 30,
+    'retries': {'mode': 'adaptive', 'max_attempts': 3},
+}
+
+
+def client_config(**overrides: Any):
+    """Return a botocore Config with CLIENT_DEFAULTS, overridden per keyword"""
+    from botocore.config import Config
+    return Config(**{**CLIENT_DEFAULTS, **overrides})
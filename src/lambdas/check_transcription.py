@@ -15,6 +15,7 @@ Input Event:
 }
 
 Output:
+- Caches the transcript text on the video item (transcript_text) when it fits
 - Triggers chunk_transcript when transcription completes
 - Re-invokes itself if still processing (with incremented attempt)
 - Fails if max_attempts reached or transcription fails
@@ -24,9 +25,10 @@ import json
 import os
 import boto3
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # AWS clients
+s3 = boto3.client('s3')
 transcribe = boto3.client('transcribe')
 lambda_client = boto3.client('lambda')
 dynamodb = boto3.resource('dynamodb')
@@ -35,10 +37,34 @@ dynamodb = boto3.resource('dynamodb')
 METADATA_TABLE = os.environ['METADATA_TABLE']
 POLL_INTERVAL_SECONDS = int(os.environ.get('POLL_INTERVAL_SECONDS', '30'))
 MAX_ATTEMPTS = int(os.environ.get('MAX_ATTEMPTS', '60'))  # 30 minutes max
+PROCESSED_BUCKET = os.environ.get('PROCESSED_BUCKET')
+# Leave headroom under DynamoDB's 400 KB item limit; longer transcripts are read from S3
+TRANSCRIPT_TEXT_MAX_BYTES = 350 * 1024
 
 table = dynamodb.Table(METADATA_TABLE)
 
 
+def load_transcript_text(video_id: str) -> Optional[str]:
+    """
+    Read the plain transcript text from the Transcribe output in S3
+    
+    Returns None if it can't be read or is too large to cache on the video item.
+    """
+    try:
+        response = s3.get_object(Bucket=PROCESSED_BUCKET, Key=f"{video_id}/transcript.json")
+        transcript_data = json.loads(response['Body'].read())
+        transcripts = transcript_data.get('results', {}).get('transcripts', [])
+        transcript_text = transcripts[0].get('transcript', '') if transcripts else ''
+    except Exception as e:
+        print(f"⚠️  Could not read transcript text for {video_id}: {e}")
+        return None
+    
+    if len(transcript_text.encode('utf-8')) > TRANSCRIPT_TEXT_MAX_BYTES:
+        print(f"Transcript for {video_id} too large to cache ({len(transcript_text)} chars), S3 only")
+        return None
+    return transcript_text
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Check transcription status and trigger next step in pipeline
@@ -68,13 +94,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             # Success! Trigger chunk_transcript
             print(f"✅ Transcription complete for {video_id}")
             
-            # Update DynamoDB
+            # Update DynamoDB (cache the text so get_full_transcript can skip S3)
+            update_expression = 'SET transcription_status = :status'
+            expression_values = {':status': 'completed'}
+            transcript_text = load_transcript_text(video_id)
+            if transcript_text is not None:
+                update_expression += ', transcript_text = :transcript_text'
+                expression_values[':transcript_text'] = transcript_text
+            
             table.update_item(
                 Key={'video_id': video_id},
-                UpdateExpression='SET transcription_status = :status',
-                ExpressionAttributeValues={
-                    ':status': 'completed'
-                }
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=expression_values
             )
             
             # Trigger chunk_transcript Lambda
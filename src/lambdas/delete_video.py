@@ -3,7 +3,7 @@ Video Delete Lambda
 Handles comprehensive deletion of videos from the system:
 1. Delete raw video from S3
 2. Delete all processed data (transcripts, frames, embeddings)
-3. Delete metadata from DynamoDB
+3. Delete metadata and frame captions from DynamoDB
 4. Trigger Knowledge Base sync to remove indexed data
 """
 
@@ -11,6 +11,7 @@ import json
 import os
 import boto3
 from typing import Dict, Any
+from boto3.dynamodb.conditions import Key
 
 # AWS clients
 s3 = boto3.client('s3')
@@ -22,12 +23,14 @@ s3vectors = boto3.client('s3vectors')
 VIDEOS_BUCKET = os.environ.get('VIDEOS_BUCKET')
 PROCESSED_BUCKET = os.environ.get('PROCESSED_BUCKET')
 METADATA_TABLE = os.environ.get('METADATA_TABLE')
+CAPTIONS_TABLE = os.environ.get('CAPTIONS_TABLE', 'mvip-frame-captions')
 SPEECH_KB_ID = os.environ.get('SPEECH_KB_ID')  # mvip-speech-index
 CAPTION_KB_ID = os.environ.get('CAPTION_KB_ID')  # mvip-caption-index
 S3_VECTOR_BUCKET = os.environ.get('S3_VECTOR_BUCKET', 'mvip-image-vectors')
 S3_VECTOR_INDEX = os.environ.get('S3_VECTOR_INDEX', 'image-embeddings')
 
 table = dynamodb.Table(METADATA_TABLE)
+captions_table = dynamodb.Table(CAPTIONS_TABLE)
 
 
 def delete_s3_folder(bucket: str, prefix: str) -> int:
@@ -70,6 +73,31 @@ def delete_s3_folder(bucket: str, prefix: str) -> int:
     return deleted_count
 
 
+def delete_frame_captions(video_id: str) -> int:
+    """
+    Delete all frame caption items for a video from the captions table.
+    Returns count of deleted items.
+    """
+    deleted_count = 0
+    query_kwargs = {
+        'KeyConditionExpression': Key('video_id').eq(video_id),
+        'ProjectionExpression': 'video_id, frame_number'
+    }
+    
+    with captions_table.batch_writer() as batch:
+        while True:
+            response = captions_table.query(**query_kwargs)
+            for item in response['Items']:
+                batch.delete_item(Key={'video_id': item['video_id'], 'frame_number': item['frame_number']})
+                deleted_count += 1
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    return deleted_count
+
+
 def delete_image_vectors(video_id: str) -> int:
     """
     Delete all image vectors for a video from S3 Vectors.
@@ -213,6 +241,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'raw_video': False,
             'processed_files': 0,
             'metadata': False,
+            'frame_captions': 0,
             'image_vectors': 0,
             'speech_kb_synced': False,
             'caption_kb_synced': False
@@ -247,6 +276,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         except Exception as e:
             print(f"  ⚠️  Error deleting metadata: {e}")
         
+        try:
+            deleted_captions = delete_frame_captions(video_id)
+            print(f"  ✅ Deleted {deleted_captions} frame captions")
+            deletion_summary['frame_captions'] = deleted_captions
+        except Exception as e:
+            print(f"  ⚠️  Error deleting frame captions: {e}")
+        
         # 4. Delete image vectors from S3 Vectors
         print(f"\n4️⃣  Deleting image vectors...")
         deletion_summary['image_vectors'] = delete_image_vectors(video_id)
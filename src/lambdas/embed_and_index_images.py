@@ -15,16 +15,28 @@ Cost: ~$0.004 per video (45 images × $0.0001 per embedding)
 
 import json
 import base64
+import logging
 import os
+import time
 import boto3
 from decimal import Decimal
+from io import BytesIO
 from typing import List, Dict, Any
+from PIL import Image
+
+from aws_config import client_config
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Initialize AWS clients
-s3 = boto3.client('s3')
-bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
+# Larger connection pool so concurrent calls reuse TLS connections
+# (botocore defaults to 10 pooled connections)
+boto_config = client_config(max_pool_connections=64)
+s3 = boto3.client('s3', config=boto_config)
+bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1', config=boto_config)
 dynamodb = boto3.resource('dynamodb')
-s3vectors = boto3.client('s3vectors', region_name='us-east-1')
+s3vectors = boto3.client('s3vectors', region_name='us-east-1', config=boto_config)
 
 # Environment variables
 PROCESSED_BUCKET = os.environ['PROCESSED_BUCKET']
@@ -32,42 +44,102 @@ METADATA_TABLE = os.environ['METADATA_TABLE']
 S3_VECTOR_BUCKET = os.environ.get('S3_VECTOR_BUCKET', 'mvip-image-vectors')
 S3_VECTOR_INDEX = os.environ.get('S3_VECTOR_INDEX', 'image-embeddings')
 BEDROCK_MODEL = os.environ.get('BEDROCK_MULTIMODAL_MODEL', 'amazon.titan-embed-image-v1')
+# Titan Multimodal output length (256, 384 or 1024); must match the vector index dimension
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
+
+# Precomputed once instead of per frame
+PROCESSED_S3_URI_PREFIX = f"s3://{PROCESSED_BUCKET}/"
+
+# DynamoDB table
+table = dynamodb.Table(METADATA_TABLE)
+
+logger.info(
+    "Configuration: processed_bucket=%s vector_bucket=%s vector_index=%s bedrock_model=%s",
+    PROCESSED_BUCKET, S3_VECTOR_BUCKET, S3_VECTOR_INDEX, BEDROCK_MODEL
+)
+
+# Titan Multimodal downscales inputs to 224x224 internally, so larger frames only
+# cost upload bytes and base64 time
+EMBED_IMAGE_SIZE = 224
+EMBED_IMAGE_QUALITY = 85
+
+# Titan request envelope; only the base64 image is encoded per frame
+EMBEDDING_REQUEST_TEMPLATE = (
+    b'{"inputImage":"%%s","embeddingConfig":{"outputEmbeddingLength":%d}}' % EMBEDDING_DIMENSION
+)
+
 
-print(f"Configuration:")
-print(f"  Processed Bucket: {PROCESSED_BUCKET}")
-print(f"  Vector Bucket: {S3_VECTOR_BUCKET}")
-print(f"  Vector Index: {S3_VECTOR_INDEX}")
-print(f"  Bedrock Model: {BEDROCK_MODEL}")
+def is_titan_image(image_bytes: bytes) -> bool:
+    """True for JPEG/PNG, the only image formats Titan Multimodal accepts"""
+    return image_bytes.startswith((b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n'))
 
-def generate_image_embedding(image_bytes: bytes) -> List[float]:
+
+def resize_for_embedding(image_stream):
     """
-    Generate multimodal embedding for an image using Bedrock Titan Multimodal.
+    Downscale a frame to Titan's ingest resolution and re-encode it as JPEG.
     
     Args:
-        image_bytes: Raw image bytes (JPG)
+        image_stream: File-like object with the raw image bytes (JPG or WebP)
     
     Returns:
-        List of 1024 floats (embedding vector)
+        Resized JPG bytes
+    
+    Raises:
+        ValueError: The frame can't be decoded and isn't JPEG/PNG (e.g. a
+            WebP frame from FRAME_FORMAT=webp), so Titan would reject it
+    """
+    image_bytes = image_stream.read()
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        image.thumbnail((EMBED_IMAGE_SIZE, EMBED_IMAGE_SIZE), Image.BILINEAR)
+        
+        output = BytesIO()
+        image.convert('RGB').save(output, format='JPEG', quality=EMBED_IMAGE_QUALITY)
+        return output.getvalue()
+    except Exception as e:
+        if not is_titan_image(image_bytes):
+            raise ValueError(f"Frame is not JPEG/PNG and could not be re-encoded: {e}") from e
+        logger.warning("Error resizing frame: %s, using original", e)
+        return image_bytes
+
+
+def build_embedding_request(image_bytes: bytes) -> bytes:
     """
-    # Encode image as base64
-    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+    Build the Titan Multimodal request body for a (resized) JPG.
     
-    # Prepare request body for Titan Multimodal
-    request_body = {
-        "inputImage": image_base64
-    }
+    The base64 image is dropped into a prebuilt byte template, so no dict or
+    JSON encoder pass is needed per frame.
     
+    Args:
+        image_bytes: JPG bytes from resize_for_embedding
+    
+    Returns:
+        JSON request body as bytes
+    """
+    return EMBEDDING_REQUEST_TEMPLATE % base64.b64encode(image_bytes)
+
+
+def generate_image_embedding(image_stream) -> List[float]:
+    """
+    Generate multimodal embedding for an image using Bedrock Titan Multimodal.
+    
+    Args:
+        image_stream: File-like object with the raw image bytes (JPG)
+    
+    Returns:
+        List of EMBEDDING_DIMENSION floats (embedding vector)
+    """
     # Invoke Bedrock
     response = bedrock_runtime.invoke_model(
         modelId=BEDROCK_MODEL,
-        body=json.dumps(request_body)
+        body=build_embedding_request(resize_for_embedding(image_stream))
     )
     
     # Parse response
     response_body = json.loads(response['body'].read())
     embedding = response_body['embedding']
     
-    print(f"  Generated embedding: {len(embedding)} dimensions")
+    logger.debug("Generated embedding: %d dimensions", len(embedding))
     return embedding
 
 
@@ -77,7 +149,7 @@ def extract_frame_number(s3_key: str) -> int:
     Example: 'test-metadata-update/frames/frame_0023.jpg' -> 23
     """
     filename = s3_key.split('/')[-1]  # Get 'frame_0023.jpg'
-    frame_num = filename.replace('frame_', '').replace('.jpg', '')
+    frame_num = filename.replace('frame_', '').split('.')[0]
     return int(frame_num)
 
 
@@ -88,7 +160,7 @@ def store_vectors_in_s3(vectors: List[Dict[str, Any]]) -> None:
     Args:
         vectors: List of vector records with id, embedding, and metadata
     """
-    print(f"Storing {len(vectors)} vectors in S3 Vectors...")
+    logger.info("Storing %d vectors in S3 Vectors", len(vectors))
     
     # Prepare records for put-vectors API
     # S3 Vectors API structure: data must be dict with 'float32' key
@@ -113,9 +185,9 @@ def store_vectors_in_s3(vectors: List[Dict[str, Any]]) -> None:
             vectors=batch
         )
         
-        print(f"  Stored batch {i // batch_size + 1} ({len(batch)} vectors)")
+        logger.debug("Stored batch %d (%d vectors)", i // batch_size + 1, len(batch))
     
-    print(f"✓ All {len(vectors)} vectors stored successfully")
+    logger.info("✓ All %d vectors stored successfully", len(vectors))
 
 
 def handler(event, context):
@@ -128,10 +200,8 @@ def handler(event, context):
         "frames_prefix": "test-metadata-update/frames/"
     }
     """
-    print("=" * 80)
-    print("Embed and Index Images Lambda")
-    print("=" * 80)
-    print(f"Event: {json.dumps(event, indent=2)}")
+    started_at = time.perf_counter()
+    logger.info("Event: %s", json.dumps(event))
     
     # Parse event
     video_id = event.get('video_id')
@@ -140,11 +210,9 @@ def handler(event, context):
     if not video_id or not frames_prefix:
         raise ValueError("Missing required fields: video_id, frames_prefix")
     
-    print(f"\nProcessing video: {video_id}")
-    print(f"Frames prefix: {frames_prefix}")
+    logger.info("Processing video: %s (frames prefix: %s)", video_id, frames_prefix)
     
     # Get video metadata for duration calculation
-    table = dynamodb.Table(METADATA_TABLE)
     metadata_response = table.get_item(Key={'video_id': video_id})
     
     if 'Item' not in metadata_response:
@@ -154,40 +222,47 @@ def handler(event, context):
     duration_seconds = float(video_metadata.get('duration_seconds', 0))
     frame_count = int(video_metadata.get('frame_count', 45))
     
-    print(f"Video duration: {duration_seconds}s, Total frames: {frame_count}")
+    logger.info("Video duration: %ss, Total frames: %d", duration_seconds, frame_count)
     
-    # List all frames in S3
-    print(f"\nListing frames from s3://{PROCESSED_BUCKET}/{frames_prefix}")
-    response = s3.list_objects_v2(
+    # List all frames in S3 (paginated: list_objects_v2 returns at most 1000 keys per call)
+    logger.info("Listing frames from s3://%s/%s", PROCESSED_BUCKET, frames_prefix)
+    paginator = s3.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
         Bucket=PROCESSED_BUCKET,
         Prefix=frames_prefix
     )
     
-    if 'Contents' not in response:
+    frame_objects = [
+        obj
+        for page in pages
+        for obj in page.get('Contents', [])
+        if obj['Key'].endswith(('.jpg', '.webp'))
+    ]
+    
+    if not frame_objects:
         raise ValueError(f"No frames found at {frames_prefix}")
     
-    frame_objects = [obj for obj in response['Contents'] if obj['Key'].endswith('.jpg')]
-    print(f"Found {len(frame_objects)} frames")
+    logger.info("Found %d frames", len(frame_objects))
     
     # Process each frame
     vectors = []
     total_embedding_cost = 0.0
+    vector_id_prefix = video_id + '_frame_'
     
     for idx, frame_obj in enumerate(frame_objects, 1):
         frame_key = frame_obj['Key']
         frame_number = extract_frame_number(frame_key)
         
-        print(f"\nProcessing frame {idx}/{len(frame_objects)}: {frame_key}")
+        logger.debug("Processing frame %d/%d: %s", idx, len(frame_objects), frame_key)
         
-        # Read image from S3
+        # Frame is downscaled before encoding, so only a few KB are base64-encoded
         image_response = s3.get_object(Bucket=PROCESSED_BUCKET, Key=frame_key)
-        image_bytes = image_response['Body'].read()
-        image_size = len(image_bytes)
+        image_size = image_response['ContentLength']
         
-        print(f"  Size: {image_size:,} bytes")
+        logger.debug("Size: %d bytes", image_size)
         
         # Generate embedding
-        embedding = generate_image_embedding(image_bytes)
+        embedding = generate_image_embedding(image_response['Body'])
         
         # Calculate exact timestamp for this frame
         # Frames are evenly spaced: frame 1 at 0s, last frame at duration
@@ -195,7 +270,7 @@ def handler(event, context):
         
         # Prepare vector record
         # S3 Vectors supports string, number, boolean, and list types for metadata
-        vector_id = f"{video_id}_frame_{frame_number:04d}"
+        vector_id = vector_id_prefix + format(frame_number, '04d')
         vectors.append({
             'id': vector_id,
             'embedding': embedding,
@@ -205,7 +280,7 @@ def handler(event, context):
                 'timestamp': round(timestamp, 2),  # Exact capture time in seconds
                 'duration_seconds': round(duration_seconds, 2),
                 's3_key': frame_key,
-                's3_uri': f"s3://{PROCESSED_BUCKET}/{frame_key}",
+                's3_uri': PROCESSED_S3_URI_PREFIX + frame_key,
                 'size_bytes': image_size
             }
         })
@@ -213,17 +288,13 @@ def handler(event, context):
         # Track cost (Titan Multimodal: ~$0.0001 per image)
         total_embedding_cost += 0.0001
     
-    print(f"\n{'=' * 80}")
-    print(f"Generated {len(vectors)} embeddings")
-    print(f"Estimated cost: ${total_embedding_cost:.4f}")
-    print(f"{'=' * 80}")
+    logger.info("Generated %d embeddings (estimated cost: $%.4f)", len(vectors), total_embedding_cost)
     
     # Store all vectors in S3 Vectors
     store_vectors_in_s3(vectors)
     
     # Update DynamoDB metadata
-    print(f"\nUpdating DynamoDB metadata for video: {video_id}")
-    table = dynamodb.Table(METADATA_TABLE)
+    logger.info("Updating DynamoDB metadata for video: %s", video_id)
     
     table.update_item(
         Key={'video_id': video_id},
@@ -235,7 +306,7 @@ def handler(event, context):
         }
     )
     
-    print("✓ DynamoDB metadata updated")
+    logger.info("✓ DynamoDB metadata updated")
     
     # Return summary
     result = {
@@ -247,10 +318,14 @@ def handler(event, context):
         'status': 'success'
     }
     
-    print(f"\n{'=' * 80}")
-    print("✓ Image indexing complete")
-    print(json.dumps(result, indent=2))
-    print(f"{'=' * 80}")
+    # Single structured summary line instead of per-frame output
+    logger.info(json.dumps({
+        'event': 'image_indexing_complete',
+        'video_id': video_id,
+        'frames': len(vectors),
+        'cost': round(total_embedding_cost, 4),
+        'duration_ms': round((time.perf_counter() - started_at) * 1000)
+    }))
     
     return result
 
@@ -123,6 +123,10 @@ def handler(event, context):
     """
     Lambda handler: Generate embeddings for frame captions (no chunking needed)
     """
+    # Scheduled warmup ping: return before any AWS calls
+    if event.get('warmup'):
+        return {'statusCode': 200}
+    
     print(f"Event: {json.dumps(event)}")
     
     # Parse event
@@ -37,6 +37,8 @@ dynamodb = boto3.resource('dynamodb')
 PROCESSED_BUCKET = os.environ['PROCESSED_BUCKET']
 METADATA_TABLE = os.environ['METADATA_TABLE']
 BEDROCK_MULTIMODAL_MODEL = os.environ.get('BEDROCK_MULTIMODAL_MODEL', 'amazon.titan-embed-image-v1')
+# Titan Multimodal output length (256, 384 or 1024); must match the vector index dimension
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
 
 # Cost tracking
 COST_PER_EMBEDDING = 0.00006  # Approximate cost per Titan Image embedding
@@ -112,7 +114,8 @@ def generate_image_embedding(image_bytes: bytes) -> List[float]:
         image_base64 = base64.b64encode(image_bytes).decode('utf-8')
         
         request_body = {
-            "inputImage": image_base64
+            "inputImage": image_base64,
+            "embeddingConfig": {"outputEmbeddingLength": EMBEDDING_DIMENSION}
         }
         
         response = bedrock_runtime.invoke_model(
@@ -132,28 +135,25 @@ def generate_image_embedding(image_bytes: bytes) -> List[float]:
         return []
 
 
-def calculate_frame_timestamp(frame_number: int, total_frames: int, video_duration_sec: float) -> float:
+def calculate_frame_interval(total_frames: int, video_duration_sec: float) -> float:
     """
-    Calculate timestamp for frame based on even distribution
+    Calculate the spacing between frames based on even distribution
+    
+    Computed once per video so the per-frame timestamp is a single multiply:
+    frame 1 is at 0s, frame N is at (N-1) * interval
     
     Args:
-        frame_number: Frame number (1-based)
         total_frames: Total number of frames
         video_duration_sec: Video duration in seconds
     
     Returns:
-        Timestamp in seconds
+        Frame interval in seconds (0.0 for single-frame videos)
     """
     if total_frames <= 1:
         return 0.0
     
     # Frames are evenly distributed: frame_interval = duration / total_frames
-    frame_interval = video_duration_sec / total_frames
-    
-    # Frame 1 is at 0s, frame N is at (N-1) * interval
-    timestamp = (frame_number - 1) * frame_interval
-    
-    return timestamp
+    return video_duration_sec / total_frames
 
 
 def handler(event, context):
@@ -204,16 +204,17 @@ def handler(event, context):
     print("Generating multimodal embeddings for frames...")
     image_index_docs = []
     
+    # Frames are evenly distributed, so the interval is computed once per video
+    frame_interval = calculate_frame_interval(
+        total_frames=len(frames),
+        video_duration_sec=video_duration
+    )
+    
     for frame in frames:
         frame_number = frame['frame_number']
         s3_key = frame['s3_key']
         
-        # Calculate frame timestamp (frames are evenly distributed)
-        frame_timestamp_sec = calculate_frame_timestamp(
-            frame_number=frame_number,
-            total_frames=len(frames),
-            video_duration_sec=video_duration
-        )
+        frame_timestamp_sec = (frame_number - 1) * frame_interval
         
         # Download frame image
         response = s3_client.get_object(Bucket=PROCESSED_BUCKET, Key=s3_key)
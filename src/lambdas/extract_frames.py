@@ -2,22 +2,46 @@
 Feature 1.2: Frame Extraction
 Extract frames from video at configured intervals (default: 1 frame per 5 seconds)
 
-Triggered by: EventBridge rule when transcription completes
-Outputs: Frame images to S3, updates DynamoDB metadata
+Triggered by: First state of the frame pipeline state machine (started by process_video)
+Outputs: Frame images to S3, updates DynamoDB metadata, returns frame keys for the
+         state machine's caption Map
 """
 import json
 import os
 import subprocess
+import tarfile
 import tempfile
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from decimal import Decimal
+from io import BytesIO
 import boto3
+from boto3.s3.transfer import TransferConfig
+from boto3.dynamodb.types import TypeDeserializer
+
+from aws_config import client_config
+
+# Frame PUTs are small and independent, so they are issued concurrently
+UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', '32'))
 
 # AWS clients
-s3 = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
+# Pool sized for concurrent frame uploads; standard retries back off on 503 SlowDown
+boto_config = client_config(
+    max_pool_connections=UPLOAD_CONCURRENCY,
+    retries={'mode': 'standard', 'max_attempts': 5}
+)
+s3 = boto3.client('s3', config=boto_config)
+# Source video download: parallel 16 MB ranged GETs instead of one stream
+video_transfer_config = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True
+)
+# Low-level client: attribute values are marshalled by hand, no resource layer
+dynamodb = boto3.client('dynamodb')
+deserializer = TypeDeserializer()
 
 # Environment variables
 VIDEOS_BUCKET = os.environ['VIDEOS_BUCKET']
@@ -28,14 +52,40 @@ MAX_FRAMES_PER_VIDEO = int(os.environ.get('MAX_FRAMES_PER_VIDEO', '120'))
 FRAME_QUALITY = int(os.environ.get('FRAME_QUALITY', '85'))
 DEV_MODE = os.environ.get('DEV_MODE', 'false').lower() == 'true'
 DEV_DURATION_LIMIT = int(os.environ.get('DEV_DURATION_LIMIT_SECONDS', '30'))
-
-# DynamoDB table
-table = dynamodb.Table(METADATA_TABLE)
+# Also pack frames into one uncompressed tar (+ offset index) so consumers can
+# read many frames from a single object with ranged GETs
+FRAME_ARCHIVE_ENABLED = os.environ.get('FRAME_ARCHIVE_ENABLED', 'true').lower() == 'true'
+FRAME_ARCHIVE_NAME = 'frames.tar'
+FRAME_ARCHIVE_INDEX_NAME = 'frames_index.json'
+# Frames are scaled inside the ffmpeg filter graph to the caption model's input
+# size, so downstream consumers never decode/resize/re-encode full-res JPEGs
+FRAME_MAX_WIDTH = 1024
+FRAME_MAX_HEIGHT = 768
+# Frame image format: 'jpeg' (default) or 'webp' (~30-40% smaller at similar quality).
+# Opt-in because Titan image embeddings accept only JPEG/PNG, so WebP frames must be
+# re-encoded (Pillow) before image indexing.
+FRAME_FORMAT = os.environ.get('FRAME_FORMAT', 'jpeg').lower()
+FRAME_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+FRAME_CONTENT_TYPES = {'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+if FRAME_FORMAT not in FRAME_EXTENSIONS:
+    raise ValueError(f"Unsupported FRAME_FORMAT: {FRAME_FORMAT}")
+# ffmpeg writes concatenated images to stdout; JPEGs are split on SOI/EOI markers,
+# WebPs on their RIFF length header
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+PIPE_READ_CHUNK_SIZE = 64 * 1024
 
 # For PoC: Use bundled static FFmpeg binary
 import re
-# FFmpeg binary is bundled in the bin/ directory
-FFMPEG_BIN = os.path.join(os.path.dirname(__file__), 'bin', 'ffmpeg')
+# FFmpeg binary is bundled in the bin/ directory; the container image (Dockerfile)
+# points FFMPEG_PATH/FFPROBE_PATH at its own build instead
+FFMPEG_BIN = os.environ.get('FFMPEG_PATH', os.path.join(os.path.dirname(__file__), 'bin', 'ffmpeg'))
+# ffprobe is optional; without it the duration is read from ffmpeg's input header dump
+FFPROBE_BIN = os.environ.get('FFPROBE_PATH', os.path.join(os.path.dirname(__file__), 'bin', 'ffprobe'))
+# Checked once per container instead of on every invocation
+FFPROBE_AVAILABLE = os.path.exists(FFPROBE_BIN)
+if not os.access(FFMPEG_BIN, os.X_OK):
+    print(f"Warning: bundled FFmpeg not found or not executable: {FFMPEG_BIN}")
 print(f"Using bundled FFmpeg: {FFMPEG_BIN}")
 
 
@@ -53,7 +103,89 @@ def get_video_duration_from_ffmpeg_output(ffmpeg_stderr):
     return None
 
 
-def extract_frames(video_path, output_dir, max_frames=45, quality=85):
+def probe_video_duration(video_path):
+    """
+    Read video duration from the container header without decoding any frames
+    
+    Uses ffprobe when bundled; otherwise runs ffmpeg with an input and no
+    output, which prints the header (including Duration) and exits.
+    
+    Returns:
+        Duration in seconds, or None if it could not be determined
+    """
+    if FFPROBE_AVAILABLE:
+        probe_cmd = [
+            FFPROBE_BIN,
+            '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=nw=1:nk=1',
+            video_path
+        ]
+        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True)
+        try:
+            duration = float(probe_result.stdout.strip())
+            print(f"Parsed video duration: {duration} seconds")
+            return duration
+        except ValueError:
+            print(f"ffprobe could not read duration: {probe_result.stderr.strip()}")
+    
+    # No output file: ffmpeg exits non-zero after printing the input header
+    header_cmd = [FFMPEG_BIN, '-hide_banner', '-i', video_path]
+    header_result = subprocess.run(header_cmd, capture_output=True, text=True)
+    return get_video_duration_from_ffmpeg_output(header_result.stderr)
+
+
+def iter_jpeg_frames(stream, chunk_size=PIPE_READ_CHUNK_SIZE):
+    """
+    Split a concatenated MJPEG byte stream (ffmpeg image2pipe) into JPEG images
+    
+    Each image runs from an SOI marker (FF D8) to the next EOI marker (FF D9).
+    0xFF inside entropy-coded data is byte-stuffed, so EOI only appears at the end.
+    """
+    buffer = bytearray()
+    scan_from = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        while True:
+            start = buffer.find(JPEG_SOI)
+            if start < 0:
+                break
+            end = buffer.find(JPEG_EOI, max(start + 2, scan_from))
+            if end < 0:
+                # Resume the EOI search just before the new data on the next chunk
+                scan_from = len(buffer) - 1
+                break
+            yield bytes(buffer[start:end + 2])
+            del buffer[:end + 2]
+            scan_from = 0
+
+
+def iter_webp_frames(stream, chunk_size=PIPE_READ_CHUNK_SIZE):
+    """
+    Split a concatenated WebP byte stream (ffmpeg image2pipe) into WebP images
+    
+    Each image is a RIFF container: 'RIFF' + little-endian size of the rest + 'WEBP'...
+    """
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        while len(buffer) >= 8:
+            if buffer[:4] != b'RIFF':
+                raise ValueError("Unexpected data in WebP frame stream")
+            image_size = int.from_bytes(buffer[4:8], 'little') + 8
+            if len(buffer) < image_size:
+                break
+            yield bytes(buffer[:image_size])
+            del buffer[:image_size]
+
+
+def extract_frames(video_path, video_id, max_frames=45, quality=85):
     """
     Extract frames evenly distributed across video duration (Kubrick approach)
     
@@ -61,26 +193,21 @@ def extract_frames(video_path, output_dir, max_frames=45, quality=85):
     the entire video, regardless of length. For a 20-min video with 45 frames,
     we get 1 frame every ~26.7 seconds.
     
+    Frames are streamed from ffmpeg's stdout (image2pipe) and uploaded to S3 as
+    each JPEG completes; nothing is written to /tmp.
+    
     Args:
         video_path: Path to video file
-        output_dir: Directory to save frames
+        video_id: Video identifier (frames go to {video_id}/frames/)
         max_frames: Number of frames to extract (default 45, matching Kubrick)
-        quality: JPEG quality (1-100, higher = better)
+        quality: Image quality (1-100, higher = better)
     
     Returns:
-        Tuple: (frame_count, duration_seconds)
+        Tuple: (frame_count, duration_seconds, frames_s3_prefix)
     """
     try:
-        # Step 1: Get video duration first
-        duration_cmd = [
-            FFMPEG_BIN,
-            '-i', video_path,
-            '-f', 'null',
-            '-'
-        ]
-        
-        duration_result = subprocess.run(duration_cmd, capture_output=True, text=True)
-        duration = get_video_duration_from_ffmpeg_output(duration_result.stderr)
+        # Step 1: Get video duration from the container header (no decode pass)
+        duration = probe_video_duration(video_path)
         
         if not duration:
             raise ValueError("Could not determine video duration")
@@ -96,67 +223,131 @@ def extract_frames(video_path, output_dir, max_frames=45, quality=85):
         print(f"  FPS: {fps:.4f}")
         print(f"  Frame interval: ~{frame_interval:.2f} seconds")
         
-        # FFmpeg quality scale is inverted: 2 = best, 31 = worst
-        ffmpeg_quality = max(2, min(31, 31 - int((quality - 1) * 29 / 99)))
+        if FRAME_FORMAT == 'webp':
+            # libwebp takes 0-100 quality directly
+            encoder_args = ['-vcodec', 'libwebp', '-quality', str(quality), '-preset', 'photo']
+            split_frames = iter_webp_frames
+        else:
+            # FFmpeg JPEG quality scale is inverted: 2 = best, 31 = worst
+            ffmpeg_quality = max(2, min(31, 31 - int((quality - 1) * 29 / 99)))
+            encoder_args = ['-q:v', str(ffmpeg_quality), '-vcodec', 'mjpeg']
+            split_frames = iter_jpeg_frames
+        frame_extension = FRAME_EXTENSIONS[FRAME_FORMAT]
         
-        # Step 3: Extract frames
+        # Step 3: Extract frames to stdout
         cmd = [
             FFMPEG_BIN,
+            '-hide_banner',
+            '-loglevel', 'error',  # Only errors reach the stderr spool file
+            '-threads', '0',  # Decode/filter on all vCPUs
+            '-thread_queue_size', '512',  # Deeper demux queue so decode threads don't starve
             '-i', video_path,
-            '-vf', f'fps={fps}',  # Dynamic FPS for even distribution
+            # Dynamic FPS for even distribution, then downscale (never upscale) to fit 1024x768
+            '-vf', f'fps={fps},scale=w={FRAME_MAX_WIDTH}:h={FRAME_MAX_HEIGHT}:force_original_aspect_ratio=decrease',
             '-frames:v', str(max_frames),  # Exact frame count
-            '-q:v', str(ffmpeg_quality),  # Quality
-            '-f', 'image2',  # Image output format
-            f'{output_dir}/frame_%04d.jpg'
+            *encoder_args,  # Codec and quality
+            '-f', 'image2pipe',  # Concatenated images on stdout
+            'pipe:1'
         ]
         
         print(f"Command: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        frames_prefix = f"{video_id}/frames"
+        print(f"Uploading frames to s3://{PROCESSED_BUCKET}/{frames_prefix}/")
+        
+        def upload_frame(frame_file, image_bytes):
+            s3.put_object(
+                Bucket=PROCESSED_BUCKET,
+                Key=f"{frames_prefix}/{frame_file}",
+                Body=image_bytes,
+                ContentType=FRAME_CONTENT_TYPES[FRAME_FORMAT]
+            )
         
-        # Count extracted frames
-        frame_files = [f for f in os.listdir(output_dir) if f.startswith('frame_') and f.endswith('.jpg')]
-        frame_count = len(frame_files)
+        archive_frames = []
+        uploads = []
+        # stderr goes to a temp file, not a pipe: an unread stderr pipe that fills
+        # up would block ffmpeg while we are still waiting on stdout
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as executor, \
+                tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                # Single-part PUTs in parallel, issued while ffmpeg is still decoding
+                for frame_number, image_bytes in enumerate(split_frames(process.stdout), start=1):
+                    frame_file = f"frame_{frame_number:04d}.{frame_extension}"
+                    uploads.append(executor.submit(upload_frame, frame_file, image_bytes))
+                    if FRAME_ARCHIVE_ENABLED:
+                        archive_frames.append((frame_file, image_bytes))
+            except BaseException:
+                # Don't leave ffmpeg running (or a zombie) if splitting fails
+                process.kill()
+                raise
+            finally:
+                process.stdout.close()
+                process.wait()
+            
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+                raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+            
+            # Re-raise the first upload error
+            for upload in uploads:
+                upload.result()
         
-        print(f"✓ Extracted {frame_count} frames evenly across {duration:.2f} seconds")
+        frame_count = len(uploads)
         
-        return (frame_count, duration)
+        print(f"✓ Extracted and uploaded {frame_count} frames evenly across {duration:.2f} seconds")
+        
+        if FRAME_ARCHIVE_ENABLED:
+            upload_frame_archive(archive_frames, frames_prefix)
+        
+        return (frame_count, duration, frames_prefix)
         
     except subprocess.CalledProcessError as e:
         print(f"FFmpeg error: {e.stderr}")
-        duration = get_video_duration_from_ffmpeg_output(e.stderr)
         raise
 
 
-def upload_frames_to_s3(local_dir, video_id):
+def upload_frame_archive(frames, frames_prefix):
     """
-    Upload extracted frames to S3
+    Upload frames as a single uncompressed tar plus a JSON index
     
-    Args:
-        local_dir: Local directory containing frames
-        video_id: Video identifier
+    Frames are already compressed, so the tar is a plain concatenation with
+    512-byte headers. The index maps frame number to [offset, length] of the
+    image data inside the tar, for use with ranged GetObject.
     
-    Returns:
-        S3 prefix where frames are stored
+    Args:
+        frames: List of (frame_file, image_bytes) in frame order
+        frames_prefix: S3 prefix where frames are stored
     """
-    frames_prefix = f"{video_id}/frames"
-    frame_files = sorted([f for f in os.listdir(local_dir) if f.startswith('frame_') and f.endswith('.jpg')])
+    archive = BytesIO()
+    index = {}
     
-    print(f"Uploading {len(frame_files)} frames to s3://{PROCESSED_BUCKET}/{frames_prefix}/")
+    with tarfile.open(fileobj=archive, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+        for frame_file, image_bytes in frames:
+            member = tarfile.TarInfo(name=frame_file)
+            member.size = len(image_bytes)
+            member.mtime = int(time.time())
+            # USTAR header is a single block, so data starts one block after it
+            data_offset = tar.offset + tarfile.BLOCKSIZE
+            tar.addfile(member, BytesIO(image_bytes))
+            frame_number = int(frame_file.replace('frame_', '').split('.')[0])
+            index[str(frame_number)] = [data_offset, len(image_bytes)]
     
-    for frame_file in frame_files:
-        local_path = os.path.join(local_dir, frame_file)
-        s3_key = f"{frames_prefix}/{frame_file}"
-        
-        s3.upload_file(
-            local_path,
-            PROCESSED_BUCKET,
-            s3_key,
-            ExtraArgs={'ContentType': 'image/jpeg'}
-        )
+    s3.put_object(
+        Bucket=PROCESSED_BUCKET,
+        Key=f"{frames_prefix}/{FRAME_ARCHIVE_NAME}",
+        Body=archive.getvalue(),
+        ContentType='application/x-tar'
+    )
+    s3.put_object(
+        Bucket=PROCESSED_BUCKET,
+        Key=f"{frames_prefix}/{FRAME_ARCHIVE_INDEX_NAME}",
+        Body=json.dumps(index),
+        ContentType='application/json'
+    )
     
-    print(f"Successfully uploaded {len(frame_files)} frames")
-    return frames_prefix
+    print(f"Uploaded frame archive ({archive.tell() / (1024 * 1024):.2f} MB, {len(index)} frames)")
 
 
 def estimate_frame_extraction_cost(frame_count):
@@ -186,6 +377,10 @@ def handler(event, context):
     2. EventBridge rule (when Transcribe completes)
     3. Manual invocation with video_id
     """
+    # Scheduled warmup ping: return before any AWS calls
+    if event.get('warmup'):
+        return {'statusCode': 200}
+    
     print(f"Event: {json.dumps(event)}")
     
     try:
@@ -209,36 +404,23 @@ def handler(event, context):
         print(f"Processing video: {video_id}")
         
         # Get video metadata from DynamoDB
-        response = table.get_item(Key={'video_id': video_id})
+        response = dynamodb.get_item(TableName=METADATA_TABLE, Key={'video_id': {'S': video_id}})
         
         if 'Item' not in response:
             raise ValueError(f"Video {video_id} not found in metadata table")
         
-        video_meta = response['Item']
+        video_meta = {name: deserializer.deserialize(value) for name, value in response['Item'].items()}
         # Handle both naming conventions (s3_bucket or bucket)
         bucket = video_meta.get('s3_bucket', video_meta.get('bucket'))
         key = video_meta.get('s3_key', video_meta.get('key'))
         
-        # Update status
-        table.update_item(
-            Key={'video_id': video_id},
-            UpdateExpression='SET #status = :status, updated_at = :timestamp',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':status': 'extracting_frames',
-                ':timestamp': datetime.utcnow().isoformat()
-            }
-        )
-        
         # Create temp directories
         with tempfile.TemporaryDirectory() as temp_dir:
             video_path = os.path.join(temp_dir, 'video.mp4')
-            frames_dir = os.path.join(temp_dir, 'frames')
-            os.makedirs(frames_dir)
             
             # Download video from S3
             print(f"Downloading video from s3://{bucket}/{key}")
-            s3.download_file(bucket, key, video_path)
+            s3.download_file(bucket, key, video_path, Config=video_transfer_config)
             
             video_size_mb = os.path.getsize(video_path) / (1024 * 1024)
             print(f"Video downloaded: {video_size_mb:.2f} MB")
@@ -249,10 +431,10 @@ def handler(event, context):
             
             print(f"Configuration: interval={FRAME_INTERVAL_SECONDS}s, fps={fps}, max_frames={max_frames}")
             
-            # Extract frames (this will also give us duration from ffmpeg output)
-            frame_count, duration = extract_frames(
+            # Extract frames and stream them to S3 (this will also give us duration)
+            frame_count, duration, frames_prefix = extract_frames(
                 video_path=video_path,
-                output_dir=frames_dir,
+                video_id=video_id,
                 max_frames=max_frames,
                 quality=FRAME_QUALITY
             )
@@ -262,15 +444,16 @@ def handler(event, context):
                 print("Warning: Could not parse duration from ffmpeg output, estimating from frames")
                 duration = frame_count * FRAME_INTERVAL_SECONDS
             
-            # Upload frames to S3
-            frames_prefix = upload_frames_to_s3(frames_dir, video_id)
-            
             # Estimate costs
             estimated_cost = estimate_frame_extraction_cost(frame_count)
             
-            # Update DynamoDB with results
-            table.update_item(
-                Key={'video_id': video_id},
+            # Update DynamoDB with results (single write per run; progress is visible
+            # in the state machine execution). Conditional so a replay after the video
+            # was deleted doesn't recreate a partial item.
+            dynamodb.update_item(
+                TableName=METADATA_TABLE,
+                Key={'video_id': {'S': video_id}},
+                ConditionExpression='attribute_exists(video_id)',
                 UpdateExpression='''
                     SET 
                         #status = :status,
@@ -279,46 +462,38 @@ def handler(event, context):
                         frames_s3_prefix = :frames_prefix,
                         frame_extraction_cost_estimate = :cost,
                         frame_interval_seconds = :interval,
+                        frame_format = :frame_format,
                         updated_at = :timestamp
                 ''',
                 ExpressionAttributeNames={'#status': 'status'},
                 ExpressionAttributeValues={
-                    ':status': 'ready',  # Simple for PoC, will be more complex with more features
-                    ':duration': Decimal(str(round(duration, 2))),
-                    ':frame_count': frame_count,
-                    ':frames_prefix': frames_prefix,
-                    ':cost': Decimal(str(round(estimated_cost, 4))),
-                    ':interval': FRAME_INTERVAL_SECONDS,
-                    ':timestamp': datetime.utcnow().isoformat()
+                    ':status': {'S': 'ready'},  # Simple for PoC, will be more complex with more features
+                    ':duration': {'N': str(round(duration, 2))},
+                    ':frame_count': {'N': str(frame_count)},
+                    ':frames_prefix': {'S': frames_prefix},
+                    ':cost': {'N': str(round(estimated_cost, 4))},
+                    ':interval': {'N': str(FRAME_INTERVAL_SECONDS)},
+                    ':frame_format': {'S': FRAME_FORMAT},
+                    ':timestamp': {'S': datetime.utcnow().isoformat()}
                 }
             )
             
             print(f"Frame extraction complete for {video_id}")
             print(f"Extracted {frame_count} frames, estimated cost: ${estimated_cost:.4f}")
             
-            # Trigger generate_captions Lambda to create frame descriptions
-            try:
-                frames_s3_prefix = f"{video_id}/frames"
-                lambda_client.invoke(
-                    FunctionName='mvip-generate-captions',
-                    InvocationType='Event',  # Async invocation
-                    Payload=json.dumps({
-                        'video_id': video_id,
-                        'frames_s3_prefix': frames_s3_prefix
-                    })
-                )
-                print(f"✅ Triggered generate_captions for {video_id}")
-            except Exception as e:
-                print(f"⚠️  Failed to trigger generate_captions: {e}")
-                # Don't fail the whole process if caption generation trigger fails
+            # Frame keys for the state machine's caption Map (ffmpeg numbers frames from 1)
+            frame_extension = FRAME_EXTENSIONS[FRAME_FORMAT]
+            frame_keys = [f"{frames_prefix}/frame_{n:04d}.{frame_extension}" for n in range(1, frame_count + 1)]
             
             return {
                 'statusCode': 200,
                 'body': json.dumps({
                     'video_id': video_id,
+                    'title': video_meta.get('title', video_id),
                     'duration_seconds': float(duration),
                     'frame_count': frame_count,
                     'frames_s3_prefix': frames_prefix,
+                    'frame_keys': frame_keys,
                     'estimated_cost': float(estimated_cost)
                 })
             }
@@ -328,16 +503,21 @@ def handler(event, context):
         
         # Update DynamoDB with error
         if 'video_id' in locals():
-            table.update_item(
-                Key={'video_id': video_id},
-                UpdateExpression='SET #status = :status, error_message = :error, updated_at = :timestamp',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':status': 'error',
-                    ':error': str(e),
-                    ':timestamp': datetime.utcnow().isoformat()
-                }
-            )
+            try:
+                dynamodb.update_item(
+                    TableName=METADATA_TABLE,
+                    Key={'video_id': {'S': video_id}},
+                    ConditionExpression='attribute_exists(video_id)',
+                    UpdateExpression='SET #status = :status, error_message = :error, updated_at = :timestamp',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':status': {'S': 'error'},
+                        ':error': {'S': str(e)},
+                        ':timestamp': {'S': datetime.utcnow().isoformat()}
+                    }
+                )
+            except dynamodb.exceptions.ConditionalCheckFailedException:
+                print(f"Video {video_id} no longer exists, not recording error")
         
         raise
 
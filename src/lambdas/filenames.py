@@ -0,0 +1,21 @@
+"""
+Filename rules shared by the upload handlers (get_upload_url, upload_video).
+
+Both derive the video_id from the uploaded file name, so they must sanitize
+it the same way.
+"""
+
+import re
+
+# Filename sanitizing: separators become '-', then anything outside
+# letters/digits/'-'/'_'/'.' is dropped (\w keeps Unicode letters, like isalnum)
+FILENAME_SEPARATORS = str.maketrans({' ': '-', '/': '-', '\\': '-'})
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w.-]')
+
+
+def sanitize_filename(name: str) -> str:
+    """
+    Convert a title to a safe filename.
+    """
+    # Remove/replace unsafe characters, limit length
+    return UNSAFE_FILENAME_CHARS.sub('', name.translate(FILENAME_SEPARATORS))[:200]
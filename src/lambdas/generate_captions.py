@@ -4,9 +4,15 @@ Lambda Function: Generate Frame Captions
 Purpose: Generate descriptive captions for extracted video frames using Bedrock Claude Vision
          Matches Kubrick's approach: resize frames to 1024x768, simple prompt
 
-Triggered by: Manual invocation or EventBridge rule (after frame extraction completes)
+Triggered by: Frame pipeline state machine (Map over frames), or manual invocation
+              of the batch handler for a whole video
 
-Input Event:
+Handlers:
+- caption_frame_handler: Step Functions Map worker, captions one frame
+- reduce_captions_handler: Step Functions reduce step, records captions and triggers embedding
+- handler: captions all frames of a video in one invocation (manual re-runs)
+
+Input Event (handler):
 {
     "video_id": "test-video",
     "s3_bucket": "mvip-processed-{account}-{region}",
@@ -14,7 +20,7 @@ Input Event:
 }
 
 Output:
-- Captions stored in DynamoDB (frame-level metadata)
+- Captions stored in the DynamoDB captions table (one item per frame)
 - Caption documents uploaded to S3 for Caption Index (Bedrock KB #2)
 - Status updated to "captions_ready"
 
@@ -23,31 +29,76 @@ Feature: 1.3 - Frame Captions (Bedrock Claude Vision)
 
 import json
 import os
+import queue
+import random
+import threading
+import time
 import boto3
-import base64
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from decimal import Decimal
 from io import BytesIO
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
-    print("Warning: Pillow not available. Frame resizing disabled.")
+from botocore.exceptions import ClientError
+from PIL import Image
+
+from aws_config import client_config
 
 # AWS clients
-s3_client = boto3.client('s3')
-bedrock_runtime = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+# Shared by the parallel caption/download workers: a pool larger than either
+# worker count keeps connections alive (no TLS handshake per call)
+# (Converse calls on full frames can run past the default 30s read timeout)
+boto_config = client_config(
+    max_pool_connections=50,
+    read_timeout=60,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+s3_client = boto3.client('s3', config=boto_config)
+# Single attempt: Converse retries belong to converse_with_backoff (batch handler)
+# and to the state machine (Map worker), so botocore must not add a third layer
+bedrock_config = client_config(
+    max_pool_connections=50,
+    read_timeout=60,
+    retries={'mode': 'standard', 'max_attempts': 1}
+)
+bedrock_runtime = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'), config=bedrock_config)
 dynamodb = boto3.resource('dynamodb')
 lambda_client = boto3.client('lambda')
 
 # Environment variables
 PROCESSED_BUCKET = os.environ['PROCESSED_BUCKET']
 METADATA_TABLE = os.environ['METADATA_TABLE']
+# One item per frame caption (PK video_id, SK frame_number)
+CAPTIONS_TABLE = os.environ.get('CAPTIONS_TABLE', 'mvip-frame-captions')
 # Use inference profile instead of direct model ID
 # Inference profiles provide cross-region routing and better availability
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_VISION_MODEL', 'us.anthropic.claude-3-5-sonnet-20241022-v2:0')
 
+# Frames are captioned in parallel (Bedrock throttles per account, not per connection)
+CAPTION_CONCURRENCY = int(os.environ.get('CAPTION_CONCURRENCY', '10'))
+# Frame downloads are prefetched on a separate pool so S3 latency overlaps inference
+DOWNLOAD_CONCURRENCY = int(os.environ.get('DOWNLOAD_CONCURRENCY', '16'))
+# Read frames from the tar written by extract_frames (ranged GETs on one object);
+# set to false, or when the archive is missing, frames are read as individual objects
+FRAME_ARCHIVE_ENABLED = os.environ.get('FRAME_ARCHIVE_ENABLED', 'true').lower() == 'true'
+FRAME_ARCHIVE_NAME = 'frames.tar'
+FRAME_ARCHIVE_INDEX_NAME = 'frames_index.json'
+# Per-frame workers set this to 0 and rely on the state machine's retry instead
+MAX_THROTTLE_RETRIES = int(os.environ.get('MAX_THROTTLE_RETRIES', '5'))
+# Transient Converse errors worth retrying (the bedrock client itself does not retry)
+RETRYABLE_BEDROCK_ERRORS = {
+    'ThrottlingException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'InternalServerException',
+}
+# BatchWriteItem accepts at most 25 items per call
+CAPTION_BATCH_SIZE = 25
+
+# Reused across warm invocations
+table = dynamodb.Table(METADATA_TABLE)
+frames_paginator = s3_client.get_paginator('list_objects_v2')
+
 # Cost tracking
 COST_PER_IMAGE = 0.006  # Approximate cost per Claude Vision API call
 
@@ -55,98 +106,142 @@ COST_PER_IMAGE = 0.006  # Approximate cost per Claude Vision API call
 TARGET_WIDTH = 1024
 TARGET_HEIGHT = 768
 
+# Frame image formats written by extract_frames (FRAME_FORMAT): file extension -> Converse format
+FRAME_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+CONVERSE_IMAGE_FORMATS = {'jpg': 'jpeg', 'jpeg': 'jpeg', 'webp': 'webp', 'png': 'png'}
+
+def frame_dimensions(image_bytes: bytes):
+    """
+    Read (width, height) from the image header without decoding pixels.
+    Returns None if the header is unreadable.
+    """
+    try:
+        return Image.open(BytesIO(image_bytes)).size
+    except Exception:
+        return None
+
+
 def resize_frame(image_bytes: bytes) -> bytes:
     """
     Resize frame to 1024x768 (Kubrick's approach)
     
     Reduces token consumption and inference cost for VLM
     
-    Note: Requires Pillow. For PoC without Pillow, returns original bytes.
-    For production: Use Lambda Layer with pre-built Pillow for Amazon Linux.
+    extract_frames already scales frames to 1024x768 in ffmpeg, so frames that
+    fit are sent as-is (header check only, no decode/re-encode). Resizing is
+    kept for frames extracted before that change.
+    
+    Pillow ships in the dependencies layer. For JPEG frames, draft() lets the
+    decoder downscale by a power of two while decoding, so large frames are
+    never fully decoded before the LANCZOS pass.
     """
-    if not PILLOW_AVAILABLE:
-        print("Pillow not available, using original frame size")
+    dimensions = frame_dimensions(image_bytes)
+    if dimensions and dimensions[0] <= TARGET_WIDTH and dimensions[1] <= TARGET_HEIGHT:
         return image_bytes
     
     try:
         image = Image.open(BytesIO(image_bytes))
+        # JPEG only: decode at the smallest 1/2, 1/4 or 1/8 scale still >= target
+        image.draft('RGB', (TARGET_WIDTH, TARGET_HEIGHT))
         
         # Resize maintaining aspect ratio
         image.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS)
         
-        # Convert back to JPEG bytes
+        # Convert back to JPEG bytes (WebP frames may carry alpha)
         output = BytesIO()
-        image.save(output, format='JPEG', quality=85)
+        image.convert('RGB').save(output, format='JPEG', quality=85)
         return output.getvalue()
     except Exception as e:
         print(f"Error resizing frame: {e}, using original")
         return image_bytes
 
 
-def get_frame_caption(image_bytes: bytes, frame_number: int, video_context: str = "") -> dict:
+def converse_with_backoff(**kwargs):
+    """
+    Call bedrock_runtime.converse, retrying throttling and other transient errors
+    with exponential backoff and jitter (parallel caption workers share the account quota)
+    """
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        try:
+            return bedrock_runtime.converse(**kwargs)
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code not in RETRYABLE_BEDROCK_ERRORS or attempt == MAX_THROTTLE_RETRIES:
+                raise
+            delay = (2 ** attempt) + random.uniform(0, 1)
+            print(f"Bedrock {error_code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_THROTTLE_RETRIES})")
+            time.sleep(delay)
+
+
+def get_frame_caption(image_bytes: bytes, frame_number: int, video_context: str = "",
+                      image_format: str = "jpeg") -> dict:
     """
     Generate a descriptive caption for a frame using Bedrock Claude Vision
     Matches Kubrick's approach: simple, direct prompt
     
+    Uses the Converse API, which takes the image as raw bytes (no base64 or
+    JSON encoding of the image on our side).
+    
     Args:
-        image_bytes: Raw image bytes (JPEG)
+        image_bytes: Raw image bytes (JPEG or WebP)
         frame_number: Frame number for context
         video_context: Optional context about the video (title, etc.)
+        image_format: Converse image format of image_bytes ('jpeg', 'webp')
     
     Returns:
         dict with 'caption' and 'confidence' keys
     """
-    # Resize frame (match Kubrick: 1024x768)
+    # Resize frame if needed (match Kubrick: 1024x768)
     resized_bytes = resize_frame(image_bytes)
-    
-    # Encode image as base64
-    image_base64 = base64.b64encode(resized_bytes).decode('utf-8')
+    if resized_bytes is not image_bytes:
+        image_format = 'jpeg'  # resize_frame re-encodes as JPEG
     
     # Simple prompt (match Kubrick's approach)
     user_prompt = "Describe what is happening in the image"
-
-    # Bedrock Claude Vision API request (simple, like Kubrick's GPT-4o mini call)
-    request_body = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 200,  # Shorter responses
-        "temperature": 0.3,  # Lower temperature for consistent descriptions
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/jpeg",
-                            "data": image_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": user_prompt
-                    }
-                ]
-            }
-        ]
-    }
     
     try:
-        response = bedrock_runtime.invoke_model(
+        # Bedrock Claude Vision request (simple, like Kubrick's GPT-4o mini call)
+        response = converse_with_backoff(
             modelId=BEDROCK_MODEL_ID,
-            contentType='application/json',
-            accept='application/json',
-            body=json.dumps(request_body)
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "image": {
+                                "format": image_format,
+                                "source": {"bytes": resized_bytes}
+                            }
+                        },
+                        {
+                            "text": user_prompt
+                        }
+                    ]
+                }
+            ],
+            inferenceConfig={
+                "maxTokens": 200,  # Shorter responses
+                "temperature": 0.3  # Lower temperature for consistent descriptions
+            }
         )
         
-        response_body = json.loads(response['body'].read())
-        caption = response_body['content'][0]['text'].strip()
+        caption = response['output']['message']['content'][0]['text'].strip()
         
         return {
             'caption': caption,
             'model': BEDROCK_MODEL_ID,
             'confidence': 1.0  # Claude doesn't provide confidence scores
         }
+    except ClientError as e:
+        # Surface transient errors so the caller (batch loop / Step Functions retry) can handle them
+        if e.response['Error']['Code'] in RETRYABLE_BEDROCK_ERRORS:
+            raise
+        print(f"Error generating caption for frame {frame_number}: {str(e)}")
+        return {
+            'caption': f"Error generating caption: {str(e)}",
+            'model': BEDROCK_MODEL_ID,
+            'confidence': 0.0
+        }
     except Exception as e:
         print(f"Error generating caption for frame {frame_number}: {str(e)}")
         return {
@@ -156,19 +251,52 @@ def get_frame_caption(image_bytes: bytes, frame_number: int, video_context: str
         }
 
 
+def load_frame_archive_index(frames_s3_prefix: str):
+    """
+    Load the frame archive index written by extract_frames
+    
+    Returns:
+        dict of frame number (str) -> [offset, length], or None if there is no archive
+    """
+    try:
+        response = s3_client.get_object(
+            Bucket=PROCESSED_BUCKET,
+            Key=f"{frames_s3_prefix}/{FRAME_ARCHIVE_INDEX_NAME}"
+        )
+        return orjson.loads(response['Body'].read())
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+
+def download_frame(frame_key: str, archive_key: str = None, archive_range: list = None) -> bytes:
+    """
+    Download a frame image from S3
+    
+    When archive_key/archive_range are given, the frame is read with a ranged
+    GET from the frame archive instead of its individual object.
+    """
+    if archive_key and archive_range:
+        offset, length = archive_range
+        response = s3_client.get_object(
+            Bucket=PROCESSED_BUCKET,
+            Key=archive_key,
+            Range=f"bytes={offset}-{offset + length - 1}"
+        )
+    else:
+        response = s3_client.get_object(Bucket=PROCESSED_BUCKET, Key=frame_key)
+    return response['Body'].read()
+
+
 def process_frame(video_id: str, frame_key: str, frame_number: int, 
-                 timestamp_sec: float, video_title: str) -> dict:
+                 timestamp_sec: float, video_title: str, image_bytes: bytes) -> dict:
     """
-    Process a single frame: download, generate caption, prepare for index
+    Process a single (already downloaded) frame: generate caption, prepare for index
     
     Returns:
         Caption document ready for S3 upload (Caption Index)
     """
     print(f"Processing frame {frame_number}: {frame_key}")
     
-    # Download frame from S3
-    response = s3_client.get_object(Bucket=PROCESSED_BUCKET, Key=frame_key)
-    image_bytes = response['Body'].read()
     frame_size = len(image_bytes)
     
     print(f"Frame size: {frame_size} bytes")
@@ -177,7 +305,8 @@ def process_frame(video_id: str, frame_key: str, frame_number: int,
     caption_result = get_frame_caption(
         image_bytes=image_bytes,
         frame_number=frame_number,
-        video_context=video_title
+        video_context=video_title,
+        image_format=CONVERSE_IMAGE_FORMATS[frame_key.rsplit('.', 1)[-1].lower()]
     )
     
     caption = caption_result['caption']
@@ -202,10 +331,217 @@ def process_frame(video_id: str, frame_key: str, frame_number: int,
     return caption_doc
 
 
+def frame_number_from_key(frame_key: str) -> int:
+    """Extract frame number from S3 key (e.g., ".../frame_0012.jpg" -> 12)"""
+    frame_filename = frame_key.split('/')[-1]
+    return int(frame_filename.replace('frame_', '').split('.')[0])
+
+
+def store_caption_document(caption_doc: dict) -> str:
+    """
+    Upload a caption document to S3 for Caption Index (Bedrock KB #2)
+    
+    Returns:
+        S3 key of the caption document
+    """
+    doc_key = f"{caption_doc['video_id']}/caption_index/frame_{caption_doc['frame_number']:04d}.json"
+    s3_client.put_object(
+        Bucket=PROCESSED_BUCKET,
+        Key=doc_key,
+        Body=orjson.dumps(caption_doc, option=orjson.OPT_INDENT_2),  # bytes, no encode step
+        ContentType='application/json'
+    )
+    return doc_key
+
+
+def write_caption_batch(items: list) -> None:
+    """
+    Write up to 25 caption items with BatchWriteItem, retrying UnprocessedItems with backoff
+    """
+    request_items = {CAPTIONS_TABLE: [{'PutRequest': {'Item': item}} for item in items]}
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        response = dynamodb.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems')
+        if not request_items:
+            return
+        time.sleep((2 ** attempt) * 0.1 + random.uniform(0, 0.1))
+    raise RuntimeError(f"{len(request_items[CAPTIONS_TABLE])} caption items left unprocessed")
+
+
+def write_caption_items(video_id: str, captions_by_frame: dict) -> None:
+    """
+    Store one captions-table item per frame, 25 per BatchWriteItem, batches in parallel
+    """
+    timestamp = datetime.utcnow().isoformat()
+    items = [
+        {
+            'video_id': video_id,
+            'frame_number': int(frame_number),
+            'caption': caption,
+            'created_at': timestamp
+        }
+        for frame_number, caption in captions_by_frame.items()
+    ]
+    batches = [items[i:i + CAPTION_BATCH_SIZE] for i in range(0, len(items), CAPTION_BATCH_SIZE)]
+    
+    with ThreadPoolExecutor(max_workers=CAPTION_CONCURRENCY) as executor:
+        list(executor.map(write_caption_batch, batches))
+    
+    print(f"✓ Stored {len(items)} captions in {CAPTIONS_TABLE} ({len(batches)} batches)")
+
+
+def record_captions(video_id: str, frames_s3_prefix: str, captions_by_frame: dict) -> dict:
+    """
+    Store captions and status in DynamoDB, then trigger embed_captions
+    
+    Captions go to the captions table; the video item only gets status, count
+    and cost (any captions map from older runs is removed).
+    
+    Args:
+        captions_by_frame: frame number (str) -> caption text
+    
+    Returns:
+        Summary dict (video_id, caption_count, caption_index_s3_prefix, estimated_cost)
+    """
+    caption_count = len(captions_by_frame)
+    caption_index_prefix = f"{video_id}/caption_index"
+    estimated_cost = caption_count * COST_PER_IMAGE
+    
+    write_caption_items(video_id, captions_by_frame)
+    
+    table.update_item(
+        Key={'video_id': video_id},
+        UpdateExpression="""
+            SET #status = :status,
+                caption_count = :caption_count,
+                caption_index_s3_prefix = :caption_prefix,
+                processing_cost_estimate = processing_cost_estimate + :caption_cost,
+                updated_at = :timestamp
+            REMOVE captions
+        """,
+        ExpressionAttributeNames={
+            '#status': 'status'
+        },
+        ExpressionAttributeValues={
+            ':status': 'captions_ready',
+            ':caption_count': caption_count,
+            ':caption_prefix': caption_index_prefix,
+            ':caption_cost': Decimal(str(round(estimated_cost, 4))),
+            ':timestamp': datetime.utcnow().isoformat()
+        }
+    )
+    
+    print(f"✓ DynamoDB updated: status=captions_ready, caption_count={caption_count}")
+    print(f"✓ Estimated cost: ${estimated_cost:.4f}")
+    
+    # Trigger embed_captions Lambda to embed captions into Caption KB
+    try:
+        lambda_client.invoke(
+            FunctionName='mvip-embed-captions',
+            InvocationType='Event',  # Async invocation
+            Payload=json.dumps({
+                'video_id': video_id,
+                'frames_s3_prefix': frames_s3_prefix
+            })
+        )
+        print(f"✅ Triggered embed_captions for {video_id}")
+    except Exception as e:
+        print(f"⚠️  Failed to trigger embed_captions: {e}")
+        # Don't fail the whole process if embedding trigger fails
+    
+    return {
+        'video_id': video_id,
+        'caption_count': caption_count,
+        'caption_index_s3_prefix': caption_index_prefix,
+        'estimated_cost': round(estimated_cost, 4)
+    }
+
+
+def caption_frame_handler(event, context):
+    """
+    Step Functions Map worker: caption a single frame and store its caption document
+    
+    Input Event:
+    {
+        "video_id": "test-video",
+        "frame_key": "test-video/frames/frame_0001.jpg",
+        "title": "Test Video",
+        "duration_seconds": 60.0,
+        "frame_count": 12
+    }
+    
+    Returns:
+        {"frame_number": 1, "caption": "..."} (collected by the Map state)
+    """
+    # Scheduled warmup ping: return before any AWS calls
+    if event.get('warmup'):
+        return {'statusCode': 200}
+    
+    video_id = event['video_id']
+    frame_key = event['frame_key']
+    frame_number = frame_number_from_key(frame_key)
+    frame_count = int(event.get('frame_count') or 0)
+    time_per_frame = float(event.get('duration_seconds') or 0) / frame_count if frame_count else 0
+    
+    image_bytes = download_frame(frame_key)
+    caption_doc = process_frame(
+        video_id=video_id,
+        frame_key=frame_key,
+        frame_number=frame_number,
+        timestamp_sec=(frame_number - 1) * time_per_frame,
+        video_title=event.get('title', video_id),
+        image_bytes=image_bytes
+    )
+    store_caption_document(caption_doc)
+    
+    return {
+        'frame_number': frame_number,
+        'caption': caption_doc['caption']
+    }
+
+
+def reduce_captions_handler(event, context):
+    """
+    Step Functions reduce step: record all frame captions for a video
+    
+    Input Event:
+    {
+        "video_id": "test-video",
+        "frames_s3_prefix": "test-video/frames",
+        "captions": [{"frame_number": 1, "caption": "..."}, ...]
+    }
+    
+    Frames whose worker failed (caught by the Map state) have no caption and are skipped.
+    """
+    video_id = event['video_id']
+    frames_s3_prefix = event['frames_s3_prefix']
+    results = event.get('captions', [])
+    
+    # DynamoDB Map keys must be strings
+    captions_by_frame = {
+        str(result['frame_number']): result['caption']
+        for result in results
+        if result.get('caption')
+    }
+    
+    failed = len(results) - len(captions_by_frame)
+    if failed:
+        print(f"⚠️  {failed} of {len(results)} frames failed captioning")
+    
+    return record_captions(video_id, frames_s3_prefix, captions_by_frame)
+
+
 def handler(event, context):
     """
     Lambda handler: Generate captions for all frames of a video
+    
+    Batch path for manual re-runs; the upload pipeline uses the Step Functions
+    handlers above.
     """
+    # Scheduled warmup ping: return before any AWS calls
+    if event.get('warmup'):
+        return {'statusCode': 200}
+    
     print(f"Event: {json.dumps(event)}")
     
     # Parse event
@@ -216,7 +552,6 @@ def handler(event, context):
     print(f"Frames location: s3://{PROCESSED_BUCKET}/{frames_s3_prefix}/")
     
     # Get video metadata
-    table = dynamodb.Table(METADATA_TABLE)
     response = table.get_item(Key={'video_id': video_id})
     
     if 'Item' not in response:
@@ -231,18 +566,21 @@ def handler(event, context):
     print(f"Duration: {duration_seconds} seconds")
     print(f"Frames to process: {frame_count}")
     
-    # List all frames in S3
-    frames = []
-    paginator = s3_client.get_paginator('list_objects_v2')
-    
-    for page in paginator.paginate(Bucket=PROCESSED_BUCKET, Prefix=frames_s3_prefix + '/'):
-        if 'Contents' in page:
-            for obj in page['Contents']:
-                if obj['Key'].endswith('.jpg'):
-                    frames.append(obj['Key'])
-    
-    frames.sort()  # Ensure correct order
-    print(f"Found {len(frames)} frames in S3")
+    if frame_count:
+        # extract_frames writes frame_0001.jpg..frame_{frame_count}.jpg, no listing needed
+        frame_extension = FRAME_EXTENSIONS[video_metadata.get('frame_format', 'jpeg')]
+        frames = [f"{frames_s3_prefix}/frame_{i:04d}.{frame_extension}" for i in range(1, frame_count + 1)]
+    else:
+        # Older items without frame_count: list all frames in S3
+        frames = []
+        for page in frames_paginator.paginate(Bucket=PROCESSED_BUCKET, Prefix=frames_s3_prefix + '/'):
+            if 'Contents' in page:
+                for obj in page['Contents']:
+                    if obj['Key'].endswith(('.jpg', '.webp')):
+                        frames.append(obj['Key'])
+        
+        frames.sort()  # Ensure correct order
+        print(f"Found {len(frames)} frames in S3")
     
     if len(frames) == 0:
         raise ValueError(f"No frames found in s3://{PROCESSED_BUCKET}/{frames_s3_prefix}/")
@@ -251,103 +589,89 @@ def handler(event, context):
     # Frames are evenly distributed across video duration
     time_per_frame = duration_seconds / len(frames) if len(frames) > 0 else 0
     
-    # Process each frame
+    # Prefer ranged reads from the frame archive when extract_frames wrote one
+    archive_index = load_frame_archive_index(frames_s3_prefix) if FRAME_ARCHIVE_ENABLED else None
+    archive_key = f"{frames_s3_prefix}/{FRAME_ARCHIVE_NAME}"
+    if archive_index:
+        print(f"Reading frames from archive s3://{PROCESSED_BUCKET}/{archive_key}")
+    
+    # Process frames in parallel: a download pool prefetches frame bytes into a
+    # bounded queue while the caption pool runs Bedrock calls
     caption_documents = []
     captions_by_frame = {}  # For DynamoDB storage
+    prefetched = queue.Queue(maxsize=CAPTION_CONCURRENCY * 2)
+    # Caps frames held in memory (queued + captioning) regardless of video length
+    caption_slots = threading.BoundedSemaphore(CAPTION_CONCURRENCY * 2)
     
-    for idx, frame_key in enumerate(frames, start=1):
-        # Extract frame number from filename (e.g., "frame_0012.jpg" -> 12)
-        frame_filename = frame_key.split('/')[-1]
-        frame_number = int(frame_filename.replace('frame_', '').replace('.jpg', ''))
-        
-        # Calculate timestamp
-        timestamp_sec = (frame_number - 1) * time_per_frame
-        
+    def prefetch_frame(frame_key):
         try:
-            caption_doc = process_frame(
+            frame_number = frame_number_from_key(frame_key)
+            archive_range = archive_index.get(str(frame_number)) if archive_index else None
+            image_bytes = download_frame(frame_key, archive_key, archive_range)
+            prefetched.put((frame_key, image_bytes, None))
+        except Exception as e:
+            prefetched.put((frame_key, None, e))
+    
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY) as download_pool, \
+            ThreadPoolExecutor(max_workers=CAPTION_CONCURRENCY) as caption_pool:
+        for frame_key in frames:
+            download_pool.submit(prefetch_frame, frame_key)
+        
+        futures = {}
+        for _ in range(len(frames)):
+            caption_slots.acquire()
+            frame_key, image_bytes, error = prefetched.get()
+            
+            frame_number = frame_number_from_key(frame_key)
+            
+            if error:
+                caption_slots.release()
+                print(f"✗ Error downloading frame {frame_number}: {str(error)}")
+                continue
+            
+            # Calculate timestamp
+            timestamp_sec = (frame_number - 1) * time_per_frame
+            
+            future = caption_pool.submit(
+                process_frame,
                 video_id=video_id,
                 frame_key=frame_key,
                 frame_number=frame_number,
                 timestamp_sec=timestamp_sec,
-                video_title=video_title
+                video_title=video_title,
+                image_bytes=image_bytes
             )
-            
-            caption_documents.append(caption_doc)
-            captions_by_frame[str(frame_number)] = caption_doc['caption']  # DynamoDB Map keys must be strings
-            
-            print(f"✓ Frame {idx}/{len(frames)} processed")
-            
-        except Exception as e:
-            print(f"✗ Error processing frame {frame_number}: {str(e)}")
-            # Continue with other frames
-    
+            future.add_done_callback(lambda _: caption_slots.release())
+            futures[future] = frame_number
+        
+        for completed, future in enumerate(as_completed(futures), start=1):
+            frame_number = futures[future]
+            try:
+                caption_doc = future.result()
+                
+                caption_documents.append(caption_doc)
+                captions_by_frame[str(frame_number)] = caption_doc['caption']  # DynamoDB Map keys must be strings
+                
+                print(f"✓ Frame {frame_number} processed ({completed}/{len(frames)})")
+                
+            except Exception as e:
+                print(f"✗ Error processing frame {frame_number}: {str(e)}")
+                # Continue with other frames
+    
+    caption_documents.sort(key=lambda doc: doc['frame_number'])
     print(f"Generated {len(caption_documents)} captions")
     
     # Upload caption documents to S3 for Caption Index (Bedrock KB #2)
-    caption_index_prefix = f"{video_id}/caption_index"
+    with ThreadPoolExecutor(max_workers=CAPTION_CONCURRENCY) as executor:
+        list(executor.map(store_caption_document, caption_documents))
     
-    for doc in caption_documents:
-        doc_key = f"{caption_index_prefix}/frame_{doc['frame_number']:04d}.json"
-        s3_client.put_object(
-            Bucket=PROCESSED_BUCKET,
-            Key=doc_key,
-            Body=json.dumps(doc, indent=2),
-            ContentType='application/json'
-        )
+    print(f"Uploaded {len(caption_documents)} caption documents to s3://{PROCESSED_BUCKET}/{video_id}/caption_index/")
     
-    print(f"Uploaded {len(caption_documents)} caption documents to s3://{PROCESSED_BUCKET}/{caption_index_prefix}/")
-    
-    # Update DynamoDB with captions and status
-    estimated_cost = len(caption_documents) * COST_PER_IMAGE
-    
-    table.update_item(
-        Key={'video_id': video_id},
-        UpdateExpression="""
-            SET #status = :status,
-                captions = :captions,
-                caption_count = :caption_count,
-                caption_index_s3_prefix = :caption_prefix,
-                processing_cost_estimate = processing_cost_estimate + :caption_cost,
-                updated_at = :timestamp
-        """,
-        ExpressionAttributeNames={
-            '#status': 'status'
-        },
-        ExpressionAttributeValues={
-            ':status': 'captions_ready',
-            ':captions': captions_by_frame,
-            ':caption_count': len(caption_documents),
-            ':caption_prefix': caption_index_prefix,
-            ':caption_cost': Decimal(str(round(estimated_cost, 4))),
-            ':timestamp': datetime.utcnow().isoformat()
-        }
-    )
-    
-    print(f"✓ DynamoDB updated: status=captions_ready, caption_count={len(caption_documents)}")
-    print(f"✓ Estimated cost: ${estimated_cost:.4f}")
-    
-    # Trigger embed_captions Lambda to embed captions into Caption KB
-    try:
-        lambda_client.invoke(
-            FunctionName='mvip-embed-captions',
-            InvocationType='Event',  # Async invocation
-            Payload=json.dumps({
-                'video_id': video_id,
-                'frames_s3_prefix': frames_s3_prefix
-            })
-        )
-        print(f"✅ Triggered embed_captions for {video_id}")
-    except Exception as e:
-        print(f"⚠️  Failed to trigger embed_captions: {e}")
-        # Don't fail the whole process if embedding trigger fails
+    # Update DynamoDB with captions and status, then trigger embedding
+    summary = record_captions(video_id, frames_s3_prefix, captions_by_frame)
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
-            'video_id': video_id,
-            'caption_count': len(caption_documents),
-            'caption_index_s3_prefix': caption_index_prefix,
-            'estimated_cost': round(estimated_cost, 4)
-        })
+        'body': json.dumps(summary)
     }
 
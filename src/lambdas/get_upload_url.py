@@ -9,24 +9,30 @@ uploading videos of any size directly to S3.
 import json
 import os
 import boto3
-import re
+from botocore.config import Config
 from typing import Dict, Any
 
-s3 = boto3.client('s3')
-
-VIDEOS_BUCKET = os.environ.get('VIDEOS_BUCKET')
+from filenames import sanitize_filename
 
+# Signing is local (no S3 call), so few retries; virtual-hosted URLs for browser POSTs
+boto_config = Config(
+    s3={'addressing_style': 'virtual'},
+    signature_version='s3v4',
+    retries={'max_attempts': 2}
+)
+s3 = boto3.client('s3', config=boto_config)
 
-def sanitize_filename(name: str) -> str:
-    """
-    Convert a title to a safe filename.
-    """
-    # Remove/replace unsafe characters
-    safe = name.replace(' ', '-').replace('/', '-').replace('\\', '-')
-    safe = ''.join(c for c in safe if c.isalnum() or c in '-_.')
-    # Limit length
-    return safe[:200]
+VIDEOS_BUCKET = os.environ.get('VIDEOS_BUCKET')
 
+# Presigned POST templates; only the per-upload metadata is added in the handler
+UPLOAD_EXPIRES_IN = 3600  # 1 hour
+UPLOAD_FIELDS = {
+    'Content-Type': 'video/mp4'
+}
+UPLOAD_CONDITIONS = [
+    ['content-length-range', 1, 1073741824],  # 1 byte to 1GB
+    {'Content-Type': 'video/mp4'}
+]
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -83,21 +89,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         print(f"S3 Key: {s3_key}")
         
         # Generate pre-signed POST URL (allows direct browser upload)
+        # Not cached: each response carries its own expiry
+        title = custom_title or file_name
         presigned_post = s3.generate_presigned_post(
             Bucket=VIDEOS_BUCKET,
             Key=s3_key,
             Fields={
-                'Content-Type': 'video/mp4',
-                'x-amz-meta-title': custom_title or file_name,
+                **UPLOAD_FIELDS,
+                'x-amz-meta-title': title,
                 'x-amz-meta-original-filename': file_name
             },
             Conditions=[
-                ['content-length-range', 1, 1073741824],  # 1 byte to 1GB
-                {'Content-Type': 'video/mp4'},
-                {'x-amz-meta-title': custom_title or file_name},
+                *UPLOAD_CONDITIONS,
+                {'x-amz-meta-title': title},
                 {'x-amz-meta-original-filename': file_name}
             ],
-            ExpiresIn=3600  # 1 hour
+            ExpiresIn=UPLOAD_EXPIRES_IN
         )
         
         response_body = {
@@ -106,9 +113,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'video_id': video_id,
             's3_key': s3_key,
             'bucket': VIDEOS_BUCKET,
-            'expires_in': 3600,
+            'expires_in': UPLOAD_EXPIRES_IN,
             'metadata': {
-                'title': custom_title or file_name,
+                'title': title,
                 'file_name': file_name
             }
         }
@@ -16,6 +16,7 @@ Metadata Schema (aligned with Kubrick original):
 - transcribe_job_name: AWS Transcribe job identifier
 - frame_count: Number of extracted frames (added in Feature 1.2)
 - frames_s3_prefix: Path to frames folder (added in Feature 1.2)
+- frame_format: Frame image format, jpeg or webp (added in Feature 1.2)
 - speaker_count: Number of speakers (from Transcribe diarization)
 - detected_objects: List of objects (from Rekognition in Feature 1.3)
 - detected_scenes: List of scenes (from Rekognition in Feature 1.3)
@@ -23,26 +24,52 @@ Metadata Schema (aligned with Kubrick original):
 - created_at: First creation timestamp
 - updated_at: Last update timestamp
 """
-import json
+import logging
 import os
 import urllib.parse
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 import boto3
+import orjson
+from aws_config import client_config
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # AWS clients
-s3 = boto3.client('s3')
-transcribe = boto3.client('transcribe')
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
+boto_config = client_config(
+    max_pool_connections=10, connect_timeout=3, read_timeout=15, retries={'mode': 'standard'}
+)
+s3 = boto3.client('s3', config=boto_config)
+dynamodb = boto3.client('dynamodb', config=boto_config)
+
+# Transcribe and EventBridge are only needed once a new video is
+# claimed, so they are created on first use instead of during cold start
+clients = {}
+
+
+def get_client(service_name):
+    """Return a cached boto3 client, creating it on first use"""
+    if service_name not in clients:
+        clients[service_name] = boto3.client(service_name, config=boto_config)
+    return clients[service_name]
+
 
 # Environment variables
 VIDEOS_BUCKET = os.environ['VIDEOS_BUCKET']
 PROCESSED_BUCKET = os.environ['PROCESSED_BUCKET']
 METADATA_TABLE = os.environ['METADATA_TABLE']
+# VideoUploaded events fan out (via EventBridge rules) to the frame pipeline
+# state machine and the check_transcription poller
+EVENT_SOURCE = os.environ.get('INGEST_EVENT_SOURCE', 'mvip.ingest')
+VIDEO_UPLOADED_DETAIL_TYPE = 'VideoUploaded'
+
+# Cost estimates are stored to 4 decimal places
+COST_QUANTUM = Decimal('0.0001')
 
-# DynamoDB table
-table = dynamodb.Table(METADATA_TABLE)
+# Single-pass translation tables for job names and titles
+JOB_NAME_TABLE = str.maketrans({' ': '_', '(': '', ')': '', '[': '', ']': ''})
+TITLE_SEPARATORS = str.maketrans({'-': ' ', '_': ' '})
 
 
 def extract_title_from_filename(filename):
@@ -53,7 +80,7 @@ def extract_title_from_filename(filename):
     # Remove extension
     name = filename.rsplit('.', 1)[0]
     # Replace separators with spaces
-    name = name.replace('-', ' ').replace('_', ' ')
+    name = name.translate(TITLE_SEPARATORS)
     # Title case
     return name.title()
 
@@ -62,10 +89,15 @@ def handler(event, context):
     """
     Handle S3 upload event:
     1. Extract video metadata from S3
-    2. Start AWS Transcribe job
-    3. Store metadata in DynamoDB
+    2. Store metadata in DynamoDB (conditional write skips reprocessing)
+    3. Start AWS Transcribe job
     """
-    print(f"Event: {json.dumps(event)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event).decode())
+    
+    # One clock read per invocation for job names and timestamps
+    now = datetime.now(timezone.utc)
+    timestamp = now.replace(tzinfo=None).isoformat()
     
     try:
         # Get S3 event details
@@ -73,35 +105,90 @@ def handler(event, context):
         bucket = record['s3']['bucket']['name']
         key = urllib.parse.unquote_plus(record['s3']['object']['key'])
         
-        print(f"Processing video: s3://{bucket}/{key}")
+        logger.info("Processing video: s3://%s/%s", bucket, key)
         
         # Extract video_id from filename
         video_id = os.path.splitext(os.path.basename(key))[0]
         
-        # Check if already processed (cost control: don't reprocess)
-        if is_already_processed(video_id):
-            print(f"Video {video_id} already processed. Skipping.")
-            return {
-                'statusCode': 200,
-                'body': json.dumps(f'Video {video_id} already processed')
-            }
-        
-        # Get video metadata from S3
-        head_response = s3.head_object(Bucket=bucket, Key=key)
-        size_bytes = head_response['ContentLength']
-        last_modified = head_response['LastModified']
+        # Get video metadata from the event record (head_object only if it is missing)
+        s3_object = record['s3']['object']
+        if 'size' in s3_object and 'eventTime' in record:
+            size_bytes = s3_object['size']
+            last_modified = record['eventTime']
+        else:
+            head_response = s3.head_object(Bucket=bucket, Key=key)
+            size_bytes = head_response['ContentLength']
+            last_modified = head_response['LastModified'].isoformat()
         
-        print(f"Video size: {size_bytes} bytes")
+        logger.info("Video size: %s bytes", size_bytes)
         
         # Start transcription job
         # Sanitize video_id for Transcribe job name (only alphanumeric, dots, dashes, underscores)
-        safe_video_id = video_id.replace(' ', '_').replace('(', '').replace(')', '').replace('[', '').replace(']', '')
-        transcript_job_name = f"transcribe-{safe_video_id}-{int(datetime.now().timestamp())}"
+        safe_video_id = video_id.translate(JOB_NAME_TABLE)
+        transcript_job_name = f"transcribe-{safe_video_id}-{int(now.timestamp())}"
         transcript_output_key = f"{video_id}/transcript.json"
         
-        print(f"Starting transcription job: {transcript_job_name}")
+        # Store metadata in DynamoDB (aligned with Kubrick schema)
+        title = extract_title_from_filename(video_id)
+        estimated_cost = estimate_transcription_cost(size_bytes)
+        
+        # Claim the video with a single conditional write (cost control: don't reprocess)
+        try:
+            # update_item keeps created_at and clears a previous error when retrying
+            dynamodb.update_item(
+                TableName=METADATA_TABLE,
+                Key={'video_id': {'S': video_id}},
+                UpdateExpression=(
+                    'SET title = :title, '
+                    # S3 locations
+                    's3_bucket = :bucket, s3_key = :key, '
+                    'processed_bucket = :processed_bucket, transcript_s3_key = :transcript_key, '
+                    # Video properties (duration/frames are added by extract_frames)
+                    'size_bytes = :size_bytes, '
+                    # Processing status (speaker_count is added when Transcribe completes)
+                    '#status = :status, transcribe_job_name = :job_name, '
+                    # Timestamps
+                    'upload_timestamp = :timestamp, last_modified = :last_modified, '
+                    'created_at = if_not_exists(created_at, :timestamp), updated_at = :timestamp, '
+                    # Cost tracking
+                    'processing_cost_estimate = :cost '
+                    'REMOVE error_message'
+                ),
+                # Videos that are ready or still in flight are not reprocessed
+                ConditionExpression=(
+                    'attribute_not_exists(video_id) '
+                    'OR NOT #status IN (:ready, :status, :processing)'
+                ),
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':title': {'S': title},
+                    ':bucket': {'S': bucket},
+                    ':key': {'S': key},
+                    ':processed_bucket': {'S': PROCESSED_BUCKET},
+                    ':transcript_key': {'S': transcript_output_key},
+                    ':size_bytes': {'N': str(size_bytes)},
+                    ':status': {'S': 'transcribing'},
+                    ':ready': {'S': 'ready'},
+                    ':processing': {'S': 'processing'},
+                    ':job_name': {'S': transcript_job_name},
+                    ':timestamp': {'S': timestamp},
+                    ':last_modified': {'S': last_modified},
+                    ':cost': {'N': str(Decimal(estimated_cost).quantize(COST_QUANTUM))}
+                }
+            )
+        except dynamodb.exceptions.ConditionalCheckFailedException:
+            logger.info("Video %s already processed. Skipping.", video_id)
+            return {
+                'statusCode': 200,
+                'body': orjson.dumps(f'Video {video_id} already processed').decode()
+            }
+        
+        logger.info("Metadata stored in DynamoDB for video_id: %s (title: %s)", video_id, title)
+        logger.info("Estimated transcription cost: $%.4f", estimated_cost)
         
-        transcribe.start_transcription_job(
+        logger.info("Starting transcription job: %s", transcript_job_name)
+        
+        get_client('transcribe').start_transcription_job(
             TranscriptionJobName=transcript_job_name,
             Media={
                 'MediaFileUri': f's3://{bucket}/{key}'
@@ -120,107 +207,52 @@ def handler(event, context):
             }
         )
         
-        print(f"Transcription job started: {transcript_job_name}")
-        
-        # Store metadata in DynamoDB (aligned with Kubrick schema)
-        timestamp = datetime.utcnow().isoformat()
-        title = extract_title_from_filename(video_id)
-        estimated_cost = estimate_transcription_cost(size_bytes)
-        
-        table.put_item(
-            Item={
-                # Core identification
-                'video_id': video_id,
-                'title': title,
-                
-                # S3 locations
-                's3_bucket': bucket,
-                's3_key': key,
-                'processed_bucket': PROCESSED_BUCKET,
-                'transcript_s3_key': transcript_output_key,
-                
-                # Video properties
-                'size_bytes': Decimal(str(size_bytes)),
-                # 'duration_seconds': will be added in Feature 1.2
-                # 'frame_count': will be added in Feature 1.2
-                # 'frames_s3_prefix': will be added in Feature 1.2
-                
-                # Processing status
-                'status': 'transcribing',
-                'transcribe_job_name': transcript_job_name,
-                # 'speaker_count': will be added when Transcribe completes
-                
-                # Labels and analysis (added in Feature 1.3+)
-                # 'detected_objects': [],
-                # 'detected_scenes': [],
-                # 'topics': [],
-                
-                # Timestamps
-                'upload_timestamp': timestamp,
-                'last_modified': last_modified.isoformat(),
-                'created_at': timestamp,
-                'updated_at': timestamp,
-                
-                # Cost tracking
-                'processing_cost_estimate': Decimal(str(round(estimated_cost, 4)))
-            }
-        )
-        
-        print(f"Metadata stored in DynamoDB for video_id: {video_id} (title: {title})")
-        print(f"Estimated transcription cost: ${estimated_cost:.4f}")
+        logger.info("Transcription job started: %s", transcript_job_name)
         
-        # Trigger extract_frames Lambda asynchronously to get duration/frames
+        # Publish one VideoUploaded event; EventBridge starts the frame pipeline
+        # (extract frames, caption them, trigger embedding) and the
+        # check_transcription poller (speech indexing)
         try:
-            lambda_client.invoke(
-                FunctionName='mvip-extract-frames',
-                InvocationType='Event',  # Async invocation
-                Payload=json.dumps({'video_id': video_id})
-            )
-            print(f"✅ Triggered extract_frames for {video_id}")
-        except Exception as e:
-            print(f"⚠️  Failed to trigger extract_frames: {e}")
-            # Don't fail the whole process if frame extraction trigger fails
-        
-        # Trigger check_transcription Lambda to poll for completion and trigger speech indexing
-        try:
-            lambda_client.invoke(
-                FunctionName='mvip-check-transcription',
-                InvocationType='Event',  # Async invocation
-                Payload=json.dumps({
+            response = get_client('events').put_events(Entries=[{
+                'Source': EVENT_SOURCE,
+                'DetailType': VIDEO_UPLOADED_DETAIL_TYPE,
+                'Detail': orjson.dumps({
                     'video_id': video_id,
-                    'transcribe_job_name': transcript_job_name,
-                    'attempt': 1
-                })
-            )
-            print(f"✅ Triggered check_transcription poller for {video_id}")
+                    'transcribe_job_name': transcript_job_name
+                }).decode()
+            }])
+            if response.get('FailedEntryCount'):
+                raise RuntimeError(response['Entries'][0].get('ErrorMessage', 'put_events failed'))
+            logger.info("✅ Published %s event for %s", VIDEO_UPLOADED_DETAIL_TYPE, video_id)
         except Exception as e:
-            print(f"⚠️  Failed to trigger check_transcription: {e}")
+            logger.warning("⚠️  Failed to publish %s event: %s", VIDEO_UPLOADED_DETAIL_TYPE, e)
             # Don't fail - transcription will still happen, just won't auto-index
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'message': f'Started processing video {video_id}',
                 'video_id': video_id,
                 'transcribe_job': transcript_job_name,
                 'estimated_cost': estimated_cost
-            })
+            }).decode()
         }
         
     except Exception as e:
-        print(f"Error processing video: {str(e)}")
+        logger.error("Error processing video: %s", e)
         
         # Store error in DynamoDB if we have video_id
         try:
             if 'video_id' in locals():
-                table.update_item(
-                    Key={'video_id': video_id},
+                dynamodb.update_item(
+                    TableName=METADATA_TABLE,
+                    Key={'video_id': {'S': video_id}},
                     UpdateExpression='SET #status = :status, error_message = :error, updated_at = :timestamp',
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
-                        ':status': 'error',
-                        ':error': str(e),
-                        ':timestamp': datetime.utcnow().isoformat()
+                        ':status': {'S': 'error'},
+                        ':error': {'S': str(e)},
+                        ':timestamp': {'S': timestamp}
                     }
                 )
         except:
@@ -229,22 +261,6 @@ def handler(event, context):
         raise e
 
 
-def is_already_processed(video_id):
-    """
-    Check if video was already processed (cost control)
-    Returns True if status is 'ready' or 'transcribing'
-    """
-    try:
-        response = table.get_item(Key={'video_id': video_id})
-        if 'Item' in response:
-            status = response['Item'].get('status')
-            if status in ['ready', 'transcribing', 'processing']:
-                return True
-    except:
-        pass
-    return False
-
-
 def estimate_transcription_cost(size_bytes, bitrate_kbps=128):
     """
     Estimate transcription cost based on file size
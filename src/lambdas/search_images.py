@@ -13,24 +13,52 @@ Architecture:
 Cost: ~$0.0001 per query + S3 Vectors query cost
 """
 
-import json
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import boto3
+import orjson
+from aws_config import client_config
 from typing import List, Dict, Any
 
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
 # Initialize AWS clients
-bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
-s3vectors = boto3.client('s3vectors', region_name='us-east-1')
+# Larger pool for fan-out queries
+boto_config = client_config(
+    max_pool_connections=20, connect_timeout=3, read_timeout=15, retries={'mode': 'standard'}
+)
+bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1', config=boto_config)
+s3vectors = boto3.client('s3vectors', region_name='us-east-1', config=boto_config)
 
 # Environment variables
 S3_VECTOR_BUCKET = os.environ.get('S3_VECTOR_BUCKET', 'mvip-image-vectors')
 S3_VECTOR_INDEX = os.environ.get('S3_VECTOR_INDEX', 'image-embeddings')
 BEDROCK_MODEL = os.environ.get('BEDROCK_MULTIMODAL_MODEL', 'amazon.titan-embed-image-v1')
+# Titan Multimodal output length (256, 384 or 1024); must match the vector index dimension
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
+
+# Batched requests ("queries") run their embed + vector query round trips in parallel
+MAX_BATCH_QUERIES = 10
+search_pool = ThreadPoolExecutor(max_workers=MAX_BATCH_QUERIES)
+
+# Warm containers reuse embeddings for repeated queries (~4 KB each as floats)
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '1024'))
+
+# Titan request envelope; only the (escaped) query text is encoded per call
+BEDROCK_TEXT_REQUEST_TEMPLATE = (
+    b'{"inputText":%%s,"embeddingConfig":{"outputEmbeddingLength":%d}}' % EMBEDDING_DIMENSION
+)
 
-print(f"Configuration:")
-print(f"  Vector Bucket: {S3_VECTOR_BUCKET}")
-print(f"  Vector Index: {S3_VECTOR_INDEX}")
-print(f"  Bedrock Model: {BEDROCK_MODEL}")
+# Vector metadata fields copied onto each match
+MATCH_METADATA_FIELDS = ('video_id', 'frame_number', 's3_key', 's3_uri', 'size_bytes')
+
+logger.info(
+    "Configuration: vector bucket=%s, vector index=%s, bedrock model=%s",
+    S3_VECTOR_BUCKET, S3_VECTOR_INDEX, BEDROCK_MODEL
+)
 
 
 def generate_text_embedding(text: str) -> List[float]:
@@ -42,27 +70,31 @@ def generate_text_embedding(text: str) -> List[float]:
         text: User query text (e.g., "Python code on screen")
     
     Returns:
-        List of 1024 floats (embedding vector)
+        List of EMBEDDING_DIMENSION floats (embedding vector)
     """
-    print(f"Generating text embedding for query: '{text}'")
-    
-    # Prepare request body for Titan Multimodal
-    request_body = {
-        "inputText": text
-    }
+    # Collapse whitespace so padded/re-spaced queries share a cache entry; case is
+    # kept because Titan embeds "AWS" and "aws" differently
+    normalized = ' '.join(text.split())
+    return list(embed_normalized_text(normalized))
+
+
+@lru_cache(maxsize=EMBEDDING_CACHE_SIZE)
+def embed_normalized_text(text: str) -> tuple:
+    """Invoke Titan Multimodal for an already normalized query (cached per container)"""
+    logger.info("Generating text embedding for query: '%s'", text)
     
-    # Invoke Bedrock
+    # Invoke Bedrock (request body for Titan Multimodal)
     response = bedrock_runtime.invoke_model(
         modelId=BEDROCK_MODEL,
-        body=json.dumps(request_body)
+        body=BEDROCK_TEXT_REQUEST_TEMPLATE % orjson.dumps(text)
     )
     
     # Parse response
-    response_body = json.loads(response['body'].read())
+    response_body = orjson.loads(response['body'].read())
     embedding = response_body['embedding']
     
-    print(f"  Generated embedding: {len(embedding)} dimensions")
-    return embedding
+    logger.debug("Generated embedding: %d dimensions", len(embedding))
+    return tuple(embedding)
 
 
 def query_similar_images(query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
@@ -70,16 +102,17 @@ def query_similar_images(query_embedding: List[float], top_k: int = 5) -> List[D
     Query S3 Vectors for images similar to the query embedding.
     
     Args:
-        query_embedding: Query vector (1024 dimensions)
+        query_embedding: Query vector (EMBEDDING_DIMENSION dimensions)
         top_k: Number of results to return
     
     Returns:
         List of matching frames with scores and metadata
     """
-    print(f"Querying S3 Vectors for top {top_k} matches...")
+    logger.info("Querying S3 Vectors for top %d matches...", top_k)
     
     # Query S3 Vectors
-    # Query vector must also be in float32 format
+    # Query vector must also be in float32 format (S3 Vectors indexes only
+    # accept float32 data, so the embedding cannot be quantized to int8 here)
     # IMPORTANT: returnMetadata must be True to get metadata back
     response = s3vectors.query_vectors(
         vectorBucketName=S3_VECTOR_BUCKET,
@@ -96,22 +129,42 @@ def query_similar_images(query_embedding: List[float], top_k: int = 5) -> List[D
         # Metadata is returned as dict (not JSON string)
         metadata = result.get('metadata', {})
         
-        matches.append({
-            'key': result.get('key'),
-            'distance': result.get('distance'),  # S3 Vectors returns 'distance' (lower is better)
-            'video_id': metadata.get('video_id'),
-            'frame_number': metadata.get('frame_number'),
-            's3_key': metadata.get('s3_key'),
-            's3_uri': metadata.get('s3_uri'),
-            'size_bytes': metadata.get('size_bytes')
-        })
+        match = {field: metadata.get(field) for field in MATCH_METADATA_FIELDS}
+        match['key'] = result.get('key')
+        match['distance'] = result.get('distance')  # S3 Vectors returns 'distance' (lower is better)
+        matches.append(match)
         
-        print(f"  Match {len(matches)}: Frame {metadata.get('frame_number')} (distance: {result.get('distance', 0):.4f})")
+        logger.debug("Match %d: Frame %s (distance: %.4f)", len(matches), match['frame_number'], match['distance'] or 0)
     
-    print(f"✓ Found {len(matches)} matches")
+    logger.info("✓ Found %d matches", len(matches))
     return matches
 
 
+def search_text(query_text: str, top_k: int) -> Dict[str, Any]:
+    """
+    Run one text-to-image search (embed the query, then query S3 Vectors).
+    
+    Args:
+        query_text: Natural language query
+        top_k: Number of results to return
+    
+    Returns:
+        Search result with query, top_k, matches and count
+    """
+    # Step 1: Generate text embedding
+    query_embedding = generate_text_embedding(query_text)
+    
+    # Step 2: Search for similar images
+    matches = query_similar_images(query_embedding, top_k)
+    
+    return {
+        'query': query_text,
+        'top_k': top_k,
+        'matches': matches,
+        'count': len(matches)
+    }
+
+
 def handler(event, context):
     """
     Lambda handler: Text-to-image semantic search.
@@ -126,54 +179,66 @@ def handler(event, context):
         "query": "Python code on screen",
         "top_k": 5
     }
+    
+    Several queries can be searched in one request with "queries" (up to
+    MAX_BATCH_QUERIES); they run concurrently and come back in order:
+    {
+        "queries": ["Python code on screen", "a whiteboard diagram"],
+        "top_k": 5
+    }
     """
-    print("=" * 80)
-    print("Search Images Lambda (CLIP Text-to-Image)")
-    print("=" * 80)
     
     # Parse event (handle both API Gateway and direct invocation)
     if 'body' in event:
         # API Gateway format
-        body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+        body = orjson.loads(event['body']) if isinstance(event['body'], str) else event['body']
     else:
         # Direct invocation format
         body = event
     
-    print(f"Request: {json.dumps(body, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request: %s", orjson.dumps(body).decode())
     
     # Extract parameters
     query_text = body.get('query')
+    queries = body.get('queries')
     top_k = body.get('top_k', 5)
     
-    if not query_text:
+    if queries is not None:
+        if (not isinstance(queries, list) or not queries
+                or len(queries) > MAX_BATCH_QUERIES
+                or not all(isinstance(q, str) and q for q in queries)):
+            return {
+                'statusCode': 400,
+                'body': orjson.dumps({
+                    'error': f'queries must be a list of 1-{MAX_BATCH_QUERIES} non-empty strings'
+                }).decode()
+            }
+        query_text = queries
+    elif not query_text:
         return {
             'statusCode': 400,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Missing required parameter: query'
-            })
+            }).decode()
         }
     
-    print(f"\nQuery: '{query_text}'")
-    print(f"Top K: {top_k}")
+    logger.info("Query: '%s' (top_k: %s)", query_text, top_k)
     
     try:
-        # Step 1: Generate text embedding
-        query_embedding = generate_text_embedding(query_text)
-        
-        # Step 2: Search for similar images
-        matches = query_similar_images(query_embedding, top_k)
-        
-        # Prepare response
-        response_body = {
-            'query': query_text,
-            'top_k': top_k,
-            'matches': matches,
-            'count': len(matches)
-        }
+        if queries is not None:
+            # Total latency is the slowest query rather than the sum
+            results = list(search_pool.map(lambda q: search_text(q, top_k), queries))
+            response_body = {
+                'queries': queries,
+                'top_k': top_k,
+                'results': results,
+                'count': len(results)
+            }
+        else:
+            response_body = search_text(query_text, top_k)
         
-        print(f"\n{'=' * 80}")
-        print("✓ Search complete")
-        print(f"{'=' * 80}")
+        logger.info("✓ Search complete")
         
         return {
             'statusCode': 200,
@@ -181,19 +246,17 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'  # CORS for web UI
             },
-            'body': json.dumps(response_body, indent=2)
+            'body': orjson.dumps(response_body, option=orjson.OPT_INDENT_2).decode()
         }
     
     except Exception as e:
-        print(f"ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR: %s", e)
         
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': str(e),
                 'query': query_text
-            })
+            }).decode()
         }
 
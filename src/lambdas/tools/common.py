@@ -0,0 +1,73 @@
+"""
+Helpers shared by the MCP tool Lambdas.
+
+Tool handlers are loaded as tools/<name>.handler from the src/lambdas asset
+root, so this module is imported as tools.common.
+"""
+
+import base64
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+
+import cbor2
+import orjson
+
+
+class TTLCache:
+    """
+    Small per-container cache with a fixed time-to-live.
+
+    Warm containers reuse recently read items (agents often call the metadata
+    and transcript tools back to back for the same video). Once max_size is
+    reached the oldest entry is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.entries = {}
+
+    def get_or_load(self, key: str, loader: Callable[[str], Optional[Any]]) -> Optional[Any]:
+        """Return the cached value for key, calling loader on a miss (None results aren't cached)"""
+        now = time.monotonic()
+        cached = self.entries.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        value = loader(key)
+        if value is not None:
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.max_size:
+                self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+
+def decimal_default(obj):
+    """Convert DynamoDB Decimal values to float for orjson serialization"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+def wants_cbor(event: Dict[str, Any]) -> bool:
+    """True when the caller sent Accept: application/cbor"""
+    headers = event.get('headers') or {}
+    accept = next((value for name, value in headers.items() if name.lower() == 'accept'), '')
+    return 'application/cbor' in (accept or '')
+
+
+def success_response(event: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """200 response, CBOR-encoded (base64 for API Gateway) when negotiated, else JSON"""
+    if wants_cbor(event):
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/cbor'},
+            'isBase64Encoded': True,
+            'body': base64.b64encode(cbor2.dumps(result)).decode()
+        }
+    return {
+        'statusCode': 200,
+        'body': orjson.dumps(result, default=decimal_default).decode()
+    }
@@ -7,14 +7,56 @@ Returns the full transcription with timestamps, speaker labels,
 and confidence scores from AWS Transcribe.
 """
 
+import logging
 import os
-import json
 import boto3
+import orjson
+from boto3.dynamodb.types import TypeDeserializer
+from aws_config import client_config
 from typing import Dict, Any
+from tools.common import TTLCache
 
-s3 = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('METADATA_TABLE', 'mvip-video-metadata'))
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+boto_config = client_config()
+s3 = boto3.client('s3', config=boto_config)
+dynamodb = boto3.client('dynamodb', config=boto_config)
+deserializer = TypeDeserializer()
+METADATA_TABLE = os.environ.get('METADATA_TABLE', 'mvip-video-metadata')
+
+# The only item attributes this tool reads
+TRANSCRIPT_FIELDS = (
+    'transcript_text', 'transcript_s3_key', 'processed_bucket',
+    'duration_seconds', 'transcribe_job_name'
+)
+
+# Recently read items, reused by warm containers for a short TTL
+item_cache = TTLCache(ttl_seconds=60, max_size=256)
+
+
+def get_video_item(video_id: str):
+    """Return the metadata item for video_id (or None), cached for a short TTL"""
+    return item_cache.get_or_load(video_id, load_video_item)
+
+
+def load_video_item(video_id: str):
+    """Read the metadata item for video_id from DynamoDB (None if missing)"""
+    response = dynamodb.get_item(
+        TableName=METADATA_TABLE,
+        Key={'video_id': {'S': video_id}},
+        ProjectionExpression=', '.join(TRANSCRIPT_FIELDS)
+    )
+    item = response.get('Item')
+    if item is not None:
+        item = {name: deserializer.deserialize(item[name]) for name in TRANSCRIPT_FIELDS if name in item}
+    return item
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -43,8 +85,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
         HTTP-style response for AgentCore Gateway
     """
-    print(f"=== get_full_transcript tool invoked ===")
-    print(f"Event: {json.dumps(event, default=str)}")
+    logger.info("=== get_full_transcript tool invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode())
     
     try:
         # Validate required input
@@ -53,32 +96,44 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             raise ValueError("video_id is required")
         
         format_type = event.get('format', 'text_only').lower()
-        print(f"Fetching transcript for video: {video_id}, format: {format_type}")
+        logger.info("Fetching transcript for video: %s, format: %s", video_id, format_type)
         
         # Get video metadata to find transcript S3 location
-        response = table.get_item(Key={'video_id': video_id})
+        item = get_video_item(video_id)
         
-        if 'Item' not in response:
+        if item is None:
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': f"Video not found: {video_id}"
-                })
+                }).decode()
+            }
+        
+        # Text cached on the item by check_transcription: no S3 read needed
+        if format_type != 'full' and 'transcript_text' in item:
+            logger.info("✓ Transcript from metadata: %d characters", len(item['transcript_text']))
+            return {
+                'statusCode': 200,
+                'body': orjson.dumps({
+                    'video_id': video_id,
+                    'transcript_text': item['transcript_text'],
+                    'duration_seconds': float(item.get('duration_seconds', 0)),
+                    'transcribe_job_name': item.get('transcribe_job_name', '')
+                }).decode()
             }
         
-        item = response['Item']
         transcript_s3_key = item.get('transcript_s3_key')
         processed_bucket = item.get('processed_bucket')
         
         if not transcript_s3_key or not processed_bucket:
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': f"Transcript not available for video: {video_id}"
-                })
+                }).decode()
             }
         
-        print(f"Reading transcript from s3://{processed_bucket}/{transcript_s3_key}")
+        logger.info("Reading transcript from s3://%s/%s", processed_bucket, transcript_s3_key)
         
         # Read transcript from S3
         try:
@@ -86,20 +141,26 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 Bucket=processed_bucket,
                 Key=transcript_s3_key
             )
-            transcript_data = json.loads(s3_response['Body'].read().decode('utf-8'))
         except s3.exceptions.NoSuchKey:
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': f"Transcript file not found in S3: {transcript_s3_key}"
-                })
+                }).decode()
             }
         
-        # Extract transcript text
-        transcripts = transcript_data.get('results', {}).get('transcripts', [])
-        transcript_text = transcripts[0].get('transcript', '') if transcripts else ''
+        if format_type != 'full' and IJSON_AVAILABLE:
+            # Stream just the transcript string instead of building the whole document
+            texts = ijson.items(s3_response['Body'], 'results.transcripts.item.transcript')
+            transcript_text = next(texts, '')
+        else:
+            transcript_data = orjson.loads(s3_response['Body'].read())
+            
+            # Extract transcript text
+            transcripts = transcript_data.get('results', {}).get('transcripts', [])
+            transcript_text = transcripts[0].get('transcript', '') if transcripts else ''
         
-        print(f"✓ Transcript retrieved: {len(transcript_text)} characters")
+        logger.info("✓ Transcript retrieved: %d characters", len(transcript_text))
         
         # Build response based on format
         result = {
@@ -115,27 +176,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         return {
             'statusCode': 200,
-            'body': json.dumps(result)
+            'body': orjson.dumps(result).decode()
         }
     
     except ValueError as e:
         # Input validation error
         error_msg = f"Invalid input: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.warning("❌ %s", error_msg)
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
     
     except Exception as e:
         # Unexpected error
         error_msg = f"Internal error: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
 
 
@@ -148,5 +207,5 @@ if __name__ == '__main__':
     }
     result = handler(test_event, None)
     print("\n=== Test Result ===")
-    print(json.dumps(result, indent=2)[:500] + "...")
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()[:500] + "...")
 
@@ -7,22 +7,53 @@ Returns comprehensive information including duration, frame count,
 processing status, timestamps, and cost estimates.
 """
 
+import heapq
+import logging
 import os
-import json
 import boto3
-from decimal import Decimal
+import orjson
 from typing import Dict, Any
+from boto3.dynamodb.types import TypeDeserializer
+from aws_config import client_config
+from tools.common import TTLCache, decimal_default
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('METADATA_TABLE', 'mvip-video-metadata'))
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
+boto_config = client_config()
+dynamodb = boto3.client('dynamodb', config=boto_config)
+deserializer = TypeDeserializer()
+METADATA_TABLE = os.environ.get('METADATA_TABLE', 'mvip-video-metadata')
+CAPTIONS_TABLE = os.environ.get('CAPTIONS_TABLE', 'mvip-frame-captions')
 
-class DecimalEncoder(json.JSONEncoder):
-    """Helper to convert Decimal to float for JSON serialization"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+CAPTION_SAMPLE_SIZE = 3
+
+# Item attributes used to build the response ('status' is a reserved word)
+METADATA_PROJECTION = ', '.join((
+    'video_id', 'title', 'duration_seconds', 'frame_count', 'size_bytes', '#status',
+    'upload_timestamp', 'last_modified', 'created_at', 'updated_at',
+    's3_bucket', 's3_key', 'processed_bucket', 'transcript_s3_key', 'frames_s3_prefix',
+    'transcribe_job_name', 'processing_cost_estimate', 'captions', 'caption_count'
+))
+
+# Recently read items, reused by warm containers for a short TTL
+item_cache = TTLCache(ttl_seconds=60, max_size=256)
+
+
+def get_video_item(video_id: str):
+    """Return the raw (low-level) metadata item for video_id (or None), cached for a short TTL"""
+    return item_cache.get_or_load(video_id, load_video_item)
+
+
+def load_video_item(video_id: str):
+    """Read the metadata item for video_id from DynamoDB (None if missing)"""
+    response = dynamodb.get_item(
+        TableName=METADATA_TABLE,
+        Key={'video_id': {'S': video_id}},
+        ProjectionExpression=METADATA_PROJECTION,
+        ExpressionAttributeNames={'#status': 'status'}
+    )
+    return response.get('Item')
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -59,8 +90,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
         HTTP-style response for AgentCore Gateway
     """
-    print(f"=== get_video_metadata tool invoked ===")
-    print(f"Event: {json.dumps(event, default=str)}")
+    logger.info("=== get_video_metadata tool invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode())
     
     try:
         # Validate required input
@@ -68,21 +100,26 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not video_id:
             raise ValueError("video_id is required")
         
-        print(f"Fetching metadata for video: {video_id}")
+        logger.info("Fetching metadata for video: %s", video_id)
         
         # Get item from DynamoDB
-        response = table.get_item(Key={'video_id': video_id})
+        raw_item = get_video_item(video_id)
         
-        if 'Item' not in response:
+        if raw_item is None:
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': f"Video not found: {video_id}"
-                })
+                }).decode()
             }
         
-        item = response['Item']
-        print(f"✓ Found video: {item.get('title', 'Untitled')}")
+        # Unmarshal everything except the legacy captions map (only a sample is returned)
+        item = {
+            name: deserializer.deserialize(value)
+            for name, value in raw_item.items()
+            if name != 'captions'
+        }
+        logger.info("✓ Found video: %s", item.get('title', 'Untitled'))
         
         # Format metadata response
         metadata = {
@@ -106,42 +143,58 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
         
         # Add captions if available
-        if 'captions' in item:
-            captions_map = item['captions']
+        if 'captions' in raw_item:
+            # Older items store all captions as a map on the video item
+            captions_map = raw_item['captions']['M']
             # Get sample of captions (first 3)
-            sample_keys = sorted(captions_map.keys(), key=int)[:3]
-            caption_sample = {k: captions_map[k] for k in sample_keys}
+            sample_keys = heapq.nsmallest(CAPTION_SAMPLE_SIZE, captions_map, key=int)
+            caption_sample = {k: deserializer.deserialize(captions_map[k]) for k in sample_keys}
             
             metadata['captions'] = {
                 'count': len(captions_map),
                 'sample': caption_sample
             }
+        elif item.get('caption_count'):
+            # Captions table: first frames come back in sort key order
+            captions_response = dynamodb.query(
+                TableName=CAPTIONS_TABLE,
+                KeyConditionExpression='video_id = :video_id',
+                ExpressionAttributeValues={':video_id': {'S': video_id}},
+                Limit=CAPTION_SAMPLE_SIZE
+            )
+            caption_sample = {
+                caption_item['frame_number']['N']: caption_item['caption']['S']
+                for caption_item in captions_response['Items']
+            }
+            
+            metadata['captions'] = {
+                'count': int(item['caption_count']),
+                'sample': caption_sample
+            }
         
-        print(f"✓ Returning metadata for {video_id}")
+        logger.info("✓ Returning metadata for %s", video_id)
         
         return {
             'statusCode': 200,
-            'body': json.dumps(metadata, cls=DecimalEncoder)
+            'body': orjson.dumps(metadata, default=decimal_default).decode()
         }
     
     except ValueError as e:
         # Input validation error
         error_msg = f"Invalid input: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.warning("❌ %s", error_msg)
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
     
     except Exception as e:
         # Unexpected error
         error_msg = f"Internal error: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
 
 
@@ -151,5 +204,5 @@ if __name__ == '__main__':
     test_event = {'video_id': 'test-metadata-update'}
     result = handler(test_event, None)
     print("\n=== Test Result ===")
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
 
@@ -7,32 +7,104 @@ This is a foundational tool that enables the agent to discover
 what videos are available for search and analysis.
 """
 
+import heapq
+import logging
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import boto3
-from decimal import Decimal
+import orjson
+from boto3.dynamodb.conditions import Key
+from aws_config import client_config
 from typing import Dict, List, Any
+from tools.common import decimal_default, success_response
 
-dynamodb = boto3.resource('dynamodb')
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+boto_config = client_config()
+dynamodb = boto3.resource('dynamodb', config=boto_config)
 table = dynamodb.Table(os.environ.get('METADATA_TABLE', 'mvip-video-metadata'))
 
+# GSI (status, upload_timestamp): status listings read only matching items, newest first
+STATUS_INDEX = 'status-upload_timestamp-index'
+
+# Every status the pipeline writes (process_video, extract_frames and the
+# caption/speech/image indexers). "all" listings merge one status-index query
+# per status, so every video with a status is listed without a second index.
+VIDEO_STATUSES = (
+    'uploaded', 'processing', 'transcribing', 'ready', 'error',
+    'captions_ready', 'caption_index_ready', 'speech_index_ready', 'image_index_ready',
+)
+status_pool = ThreadPoolExecutor(max_workers=len(VIDEO_STATUSES))
+
+# Fields a caller may request with "fields": name -> (default, converter)
+VIDEO_FIELDS = {
+    'video_id': ('', str),
+    'title': ('Untitled', str),
+    'duration_seconds': (0, float),
+    'frame_count': (0, int),
+    'upload_timestamp': ('', str),
+    'status': ('unknown', str),
+    's3_bucket': ('', str),
+    's3_key': ('', str),
+    'processing_cost_estimate': (0, float),
+}
+
+
+def query_status(status: str, params: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """
+    Return up to limit videos with the given status, newest first.
+
+    Uses a key condition on the status index (a FilterExpression would still
+    pay for every item scanned). A page stops at 1 MB even when Limit isn't
+    reached, so pages are read until limit items are collected or the
+    partition is exhausted.
+    """
+    query_kwargs = {
+        'IndexName': STATUS_INDEX,
+        'KeyConditionExpression': Key('status').eq(status),
+        'ScanIndexForward': False,
+        'Limit': limit,
+        **params
+    }
+    items = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get('Items', []))
+        
+        if len(items) >= limit or 'LastEvaluatedKey' not in response:
+            return items
+        query_kwargs['Limit'] = limit - len(items)
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
 
-class DecimalEncoder(json.JSONEncoder):
-    """Helper to convert Decimal to float for JSON serialization"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+def parse_fields(fields: Any) -> List[str]:
+    """
+    Validate the requested fields (comma-separated string or list) against
+    VIDEO_FIELDS. video_id is always included. Raises ValueError on unknown names.
+    """
+    if not fields:
+        return list(VIDEO_FIELDS)
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    requested = [name.strip() for name in fields if name.strip()]
+    unknown = [name for name in requested if name not in VIDEO_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ['video_id'] + [name for name in VIDEO_FIELDS if name in requested and name != 'video_id']
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
-    List all processed videos in the system.
+    List all processed videos in the system, newest first.
     
     Input Schema:
         {
             "limit": 10,        # Optional, defaults to 10, max 100
-            "status": "all"     # Optional: "all", "completed", "processing", "failed"
+            "status": "all",    # Optional: "all" or one status (e.g. "ready", "error")
+            "fields": "title,status",  # Optional: subset of video fields (video_id always included)
+            "format": "columnar"  # Optional: return videos as {"columns": [...], "rows": [[...]]}
         }
     
     Output Schema:
@@ -49,98 +121,95 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     "s3_key": "..."
                 }
             ],
+            # With "format": "columnar":
+            # "videos": {"columns": ["video_id", "title", ...], "rows": [["...", "...", ...]]}
             "count": 5,
-            "total_duration_seconds": 617.25
+            "total_duration_seconds": 617.25  # Only when duration_seconds is returned
         }
     
     Returns:
         HTTP-style response for AgentCore Gateway
     """
-    print(f"=== list_videos tool invoked ===")
-    print(f"Event: {json.dumps(event, default=str)}")
+    logger.info("=== list_videos tool invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode())
     
     try:
         # Parse input parameters
         limit = min(int(event.get('limit', 10)), 100)  # Cap at 100
         status_filter = event.get('status', 'all').lower()
+        fields = parse_fields(event.get('fields'))
+        columnar = event.get('format') == 'columnar'
         
-        print(f"Listing videos: limit={limit}, status={status_filter}")
+        logger.info("Listing videos: limit=%s, status=%s", limit, status_filter)
         
-        # Query DynamoDB
-        scan_params = {
-            'Limit': limit,
-            'ProjectionExpression': (
-                'video_id, title, duration_seconds, frame_count, '
-                'upload_timestamp, #status, s3_bucket, s3_key, '
-                'processing_cost_estimate'
-            ),
-            'ExpressionAttributeNames': {
-                '#status': 'status'  # 'status' is a reserved word
-            }
+        # Query DynamoDB (upload_timestamp is always read: it orders the "all" merge)
+        projected = fields if 'upload_timestamp' in fields else fields + ['upload_timestamp']
+        params = {
+            'ProjectionExpression': ', '.join(f'#{name}' for name in projected),
+            # Placeholders for every field ('status' is a reserved word)
+            'ExpressionAttributeNames': {f'#{name}': name for name in projected},
+            'ReturnConsumedCapacity': 'NONE'
         }
         
-        # Add status filter if specified
-        if status_filter != 'all':
-            scan_params['FilterExpression'] = '#status = :status_val'
-            scan_params['ExpressionAttributeValues'] = {
-                ':status_val': status_filter
-            }
-        
-        response = table.scan(**scan_params)
-        items = response.get('Items', [])
+        # The status index is sorted on upload_timestamp, so each query returns
+        # videos newest-first and nothing is sorted here
+        if status_filter == 'all':
+            # Merge the already sorted per-status lists, newest first
+            per_status = status_pool.map(
+                lambda status: query_status(status, params, limit), VIDEO_STATUSES
+            )
+            merged = heapq.merge(
+                *per_status, key=lambda item: item.get('upload_timestamp', ''), reverse=True
+            )
+            items = list(islice(merged, limit))
+        else:
+            items = query_status(status_filter, params, limit)
         
-        print(f"Found {len(items)} videos")
+        logger.info("Found %d videos", len(items))
         
-        # Format response
-        videos = []
-        total_duration = 0
+        # Format response (one row per video, values in `fields` order)
+        converters = [(name,) + VIDEO_FIELDS[name] for name in fields]
+        rows = [
+            [convert(item.get(name, default)) for name, default, convert in converters]
+            for item in items
+        ]
         
-        for item in items:
-            video = {
-                'video_id': item.get('video_id', ''),
-                'title': item.get('title', 'Untitled'),
-                'duration_seconds': float(item.get('duration_seconds', 0)),
-                'frame_count': int(item.get('frame_count', 0)),
-                'upload_timestamp': item.get('upload_timestamp', ''),
-                'status': item.get('status', 'unknown'),
-                's3_bucket': item.get('s3_bucket', ''),
-                's3_key': item.get('s3_key', ''),
-                'processing_cost_estimate': float(item.get('processing_cost_estimate', 0))
+        if columnar:
+            # Keys sent once instead of repeated per video
+            result = {
+                'videos': {'columns': fields, 'rows': rows},
+                'count': len(rows)
             }
-            videos.append(video)
-            total_duration += video['duration_seconds']
-        
-        result = {
-            'videos': videos,
-            'count': len(videos),
-            'total_duration_seconds': round(total_duration, 2)
-        }
+        else:
+            result = {
+                'videos': [dict(zip(fields, row)) for row in rows],
+                'count': len(rows)
+            }
+        if 'duration_seconds' in fields:
+            duration_index = fields.index('duration_seconds')
+            result['total_duration_seconds'] = round(sum(row[duration_index] for row in rows), 2)
         
-        print(f"✓ Returning {len(videos)} videos")
+        logger.info("✓ Returning %d videos", len(rows))
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps(result, cls=DecimalEncoder)
-        }
+        return success_response(event, result)
     
     except ValueError as e:
         # Input validation error
         error_msg = f"Invalid input: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.warning("❌ %s", error_msg)
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
     
     except Exception as e:
         # Unexpected error
         error_msg = f"Internal error: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
 
 
@@ -150,5 +219,5 @@ if __name__ == '__main__':
     test_event = {'limit': 5}
     result = handler(test_event, None)
     print("\n=== Test Result ===")
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
 
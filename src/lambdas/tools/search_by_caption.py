@@ -7,30 +7,57 @@ Uses Amazon Bedrock Knowledge Base with S3 Vectors to find
 relevant frames based on visual content descriptions.
 """
 
+import logging
 import os
-import json
-import boto3
-from typing import Dict, Any, List
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+import orjson
+from aws_config import client_config
+from typing import Dict, Any, List, Tuple
+from tools.common import success_response
 
-bedrock_agent = boto3.client('bedrock-agent-runtime')
-s3_client = boto3.client('s3')
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+@cache
+def get_client(service_name: str):
+    """
+    Return a cached boto3 client, creating it on first use.
+
+    boto3 is imported here rather than at module load so the cold-start
+    import footprint stays minimal.
+    """
+    import boto3
+    return boto3.client(service_name, config=client_config())
+
+
+# Results without inline JSON are fetched from S3 concurrently
+fetch_pool = ThreadPoolExecutor(max_workers=10)
+
+# Whether KB content text is the JSON document (detected on first results)
+kb_returns_json = None
 
 CAPTION_KB_ID = os.environ.get('CAPTION_KB_ID')  # Caption index KB ID
 
 
+def parse_s3_uri(s3_uri: str) -> Tuple[str, str]:
+    """Split s3://bucket/key into (bucket, key) without a generic URL parse"""
+    if not s3_uri.startswith('s3://'):
+        raise ValueError(f"Not an S3 URI: {s3_uri}")
+    bucket, _, key = s3_uri[5:].partition('/')
+    return bucket, key
+
+
 def get_s3_content(s3_uri: str) -> Dict[str, Any]:
     """Fetch and parse JSON content from S3"""
     try:
-        parsed = urlparse(s3_uri)
-        bucket = parsed.netloc
-        key = parsed.path.lstrip('/')
+        bucket, key = parse_s3_uri(s3_uri)
         
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        content = response['Body'].read().decode('utf-8')
-        return json.loads(content)
+        response = get_client('s3').get_object(Bucket=bucket, Key=key)
+        return orjson.loads(response['Body'].read())
     except Exception as e:
-        print(f"Error fetching S3 content from {s3_uri}: {e}")
+        logger.warning("Error fetching S3 content from %s: %s", s3_uri, e)
         return {}
 
 
@@ -38,8 +65,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Search for video frames by semantic search in frame captions.
     """
-    print(f"=== search_by_caption tool invoked ===")
-    print(f"Event: {json.dumps(event, default=str)}")
+    logger.info("=== search_by_caption tool invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode())
     
     try:
         # Validate required input
@@ -50,9 +78,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         top_k = min(int(event.get('top_k', 5)), 20)  # Cap at 20
         video_id = event.get('video_id')  # Optional filter
         
-        print(f"Searching captions: query='{query}', top_k={top_k}")
+        logger.info("Searching captions: query='%s', top_k=%s", query, top_k)
         if video_id:
-            print(f"Filtering by video_id: {video_id}")
+            logger.info("Filtering by video_id: %s", video_id)
         
         # Query Bedrock Knowledge Base
         retrieve_params = {
@@ -74,34 +102,48 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             }
         
-        response = bedrock_agent.retrieve(**retrieve_params)
+        response = get_client('bedrock-agent-runtime').retrieve(**retrieve_params)
+        
+        retrieval_results = response.get('retrievalResults', [])
+        s3_uris = [
+            item.get('location', {}).get('s3Location', {}).get('uri', '')
+            for item in retrieval_results
+        ]
+        
+        # The KB's content format is fixed at index time: detect it once from
+        # the first result instead of sniffing every item
+        global kb_returns_json
+        if kb_returns_json is None and retrieval_results:
+            first_text = retrieval_results[0].get('content', {}).get('text', '')
+            kb_returns_json = first_text.lstrip().startswith('{')
+            logger.info("KB content text is %s", 'JSON' if kb_returns_json else 'not JSON')
+        
+        documents = [{} for _ in retrieval_results]
+        if kb_returns_json:
+            for i, item in enumerate(retrieval_results):
+                try:
+                    data = orjson.loads(item.get('content', {}).get('text', ''))
+                except orjson.JSONDecodeError as e:
+                    logger.warning("Error parsing content, falling back to S3: %s", e)
+                    continue
+                if isinstance(data, dict):
+                    documents[i] = data
+        
+        # If text doesn't look like JSON, fetch the original files from S3 in parallel
+        missing = [i for i, data in enumerate(documents) if not data and s3_uris[i]]
+        if missing:
+            logger.info("Content text not JSON for %d results, fetching from S3", len(missing))
+            # Create the S3 client here: boto3 client creation isn't thread-safe
+            get_client('s3')
+            fetched = fetch_pool.map(get_s3_content, [s3_uris[i] for i in missing])
+            for i, data in zip(missing, fetched):
+                documents[i] = data
         
         # Parse results
         results = []
-        for item in response.get('retrievalResults', []):
-            content = item.get('content', {})
-            s3_uri = item.get('location', {}).get('s3Location', {}).get('uri', '')
+        for item, s3_uri, data in zip(retrieval_results, s3_uris, documents):
             score = float(item.get('score', 0))
             
-            # Try to parse content text as JSON first
-            text_content = content.get('text', '')
-            data = {}
-            
-            try:
-                if text_content.strip().startswith('{'):
-                    data = json.loads(text_content)
-                else:
-                    # If text doesn't look like JSON, fetch original file from S3
-                    print(f"Content text not JSON, fetching from S3: {s3_uri}")
-                    data = get_s3_content(s3_uri)
-            except Exception as e:
-                print(f"Error parsing content, falling back to S3: {e}")
-                data = get_s3_content(s3_uri)
-            
-            # Fallback: check if S3 fetch also failed
-            if not data and s3_uri:
-                data = get_s3_content(s3_uri)
-
             result = {
                 'video_id': data.get('video_id', ''),
                 'frame_number': int(data.get('frame_number', 0)),
@@ -113,11 +155,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             # Skip if no caption found
             if not result['caption']:
-                print(f"Skipping result with no caption: {s3_uri}")
+                logger.debug("Skipping result with no caption: %s", s3_uri)
                 continue
                 
             results.append(result)
-            print(f"  Match: score={score:.3f}, frame={result['frame_number']}, time={result['timestamp']:.1f}s")
+            logger.debug("Match: score=%.3f, frame=%s, time=%.1fs", score, result['frame_number'], result['timestamp'])
         
         output = {
             'query': query,
@@ -125,27 +167,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'count': len(results)
         }
         
-        print(f"✓ Found {len(results)} matching frames")
+        logger.info("✓ Found %d matching frames", len(results))
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps(output)
-        }
+        return success_response(event, output)
     
     except ValueError as e:
         error_msg = f"Invalid input: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.warning("❌ %s", error_msg)
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
     
     except Exception as e:
         error_msg = f"Internal error: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
@@ -7,17 +7,55 @@ Uses Amazon Titan Multimodal Embeddings G1 to find visually
 similar frames based on text queries (CLIP-equivalent).
 """
 
+import logging
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import boto3
+import orjson
+from aws_config import client_config
 from typing import Dict, Any, List
+from tools.common import success_response
 
-bedrock_runtime = boto3.client('bedrock-runtime')
-s3vectors = boto3.client('s3vectors')
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+boto_config = client_config()
+bedrock_runtime = boto3.client('bedrock-runtime', config=boto_config)
+s3vectors = boto3.client('s3vectors', config=boto_config)
+dynamodb = boto3.client('dynamodb', config=boto_config)
+
+# The video_id lookup runs while the Bedrock embedding is in flight
+lookup_pool = ThreadPoolExecutor(max_workers=2)
 
 S3_VECTOR_BUCKET = os.environ.get('S3_VECTOR_BUCKET', 'mvip-image-vectors')
 S3_VECTOR_INDEX = os.environ.get('S3_VECTOR_INDEX', 'image-embeddings')
 BEDROCK_MULTIMODAL_MODEL = os.environ.get('BEDROCK_MULTIMODAL_MODEL', 'amazon.titan-embed-image-v1')
+METADATA_TABLE = os.environ.get('METADATA_TABLE', 'mvip-video-metadata')
+
+# Warm containers reuse embeddings for repeated queries (agent retries, repeated prompts)
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '256'))
+# Titan Multimodal output length (256, 384 or 1024); must match the vector index dimension
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
+
+
+def video_exists(video_id: str) -> bool:
+    """
+    Check that the video_id filter refers to a known video.
+
+    Advisory only: if the lookup fails (e.g. throttling) the video is assumed
+    to exist and the search runs as usual.
+    """
+    try:
+        response = dynamodb.get_item(
+            TableName=METADATA_TABLE,
+            Key={'video_id': {'S': video_id}},
+            ProjectionExpression='video_id'
+        )
+    except Exception as e:
+        logger.warning("Could not check video_id %s, searching anyway: %s", video_id, e)
+        return True
+    return 'Item' in response
 
 
 def get_text_embedding(text: str) -> list:
@@ -27,10 +65,16 @@ def get_text_embedding(text: str) -> list:
     This embedding is in the same semantic space as image embeddings,
     enabling text-to-image search (CLIP capability).
     """
-    body = json.dumps({
+    return list(embed_text(text))
+
+
+@lru_cache(maxsize=EMBEDDING_CACHE_SIZE)
+def embed_text(text: str) -> tuple:
+    """Invoke Titan Multimodal for a query (cached per container)"""
+    body = orjson.dumps({
         'inputText': text,
         'embeddingConfig': {
-            'outputEmbeddingLength': 1024
+            'outputEmbeddingLength': EMBEDDING_DIMENSION
         }
     })
     
@@ -41,14 +85,16 @@ def get_text_embedding(text: str) -> list:
         body=body
     )
     
-    response_body = json.loads(response.get('body').read())
-    return response_body.get('embedding')
+    response_body = orjson.loads(response.get('body').read())
+    return tuple(response_body.get('embedding'))
 
 
 def query_s3_vectors(query_embedding: list, top_k: int = 5) -> list:
     """
     Query the S3 Vector Store for similar image frames.
     """
+    # query_vectors only takes a JSON list of numbers ({'float32': [...]});
+    # there is no packed-bytes form, so the embedding is sent as returned by Titan
     response = s3vectors.query_vectors(
         vectorBucketName=S3_VECTOR_BUCKET,
         indexName=S3_VECTOR_INDEX,
@@ -87,7 +133,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Input Schema:
         {
             "query": "Python code on screen",  # Required
-            "top_k": 5                         # Optional, default 5
+            "top_k": 5,                        # Optional, default 5
+            "video_id": "..."                  # Optional: only frames from this video
         }
     
     Output Schema:
@@ -106,10 +153,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     Returns:
-        HTTP-style response for AgentCore Gateway
+        HTTP-style response for AgentCore Gateway (an unknown video_id yields
+        an empty result set, without querying S3 Vectors)
     """
-    print(f"=== search_by_image tool invoked ===")
-    print(f"Event: {json.dumps(event, default=str)}")
+    logger.info("=== search_by_image tool invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode())
     
     try:
         # Validate required input
@@ -120,24 +169,29 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         top_k = min(int(event.get('top_k', 5)), 20)  # Cap at 20
         video_id = event.get('video_id')  # Optional filter
         
-        print(f"Searching images: query='{query}', top_k={top_k}")
+        logger.info("Searching images: query='%s', top_k=%s", query, top_k)
         if video_id:
-            print(f"Filtering by video_id: {video_id}")
+            logger.info("Filtering by video_id: %s", video_id)
         
-        # Step 1: Generate text embedding
-        print(f"Generating text embedding for query...")
-        query_embedding = get_text_embedding(query)
-        print(f"✓ Generated embedding: {len(query_embedding)} dimensions")
+        # Step 1: Generate text embedding (and resolve the video_id filter meanwhile)
+        logger.info("Generating text embedding for query...")
+        embedding_future = lookup_pool.submit(get_text_embedding, query)
+        if video_id and not lookup_pool.submit(video_exists, video_id).result():
+            # Same empty response the video_id filter would produce, minus the vector query
+            logger.info("Unknown video_id %s, returning no matches", video_id)
+            return success_response(event, {'query': query, 'results': [], 'count': 0})
+        query_embedding = embedding_future.result()
+        logger.info("✓ Generated embedding: %d dimensions", len(query_embedding))
         
         # Step 2: Query S3 Vectors (get more results if filtering by video)
         query_limit = top_k * 10 if video_id else top_k
-        print(f"Querying S3 Vectors for top {query_limit} matches...")
+        logger.info("Querying S3 Vectors for top %s matches...", query_limit)
         matches = query_s3_vectors(query_embedding, query_limit)
         
         # Step 3: Filter by video_id if specified
         if video_id:
             matches = [m for m in matches if m.get('video_id') == video_id]
-            print(f"✓ Filtered to {len(matches)} matches for video_id={video_id}")
+            logger.info("✓ Filtered to %d matches for video_id=%s", len(matches), video_id)
         
         # Step 4: Take top_k after filtering
         matches = matches[:top_k]
@@ -157,7 +211,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
             results.append(result)
             
-            print(f"  Match: frame={result['frame_number']}, timestamp={result.get('timestamp', 'N/A')}s, distance={result['distance']:.4f}")
+            logger.debug("Match: frame=%s, timestamp=%ss, distance=%.4f", result['frame_number'], result.get('timestamp', 'N/A'), result['distance'])
         
         output = {
             'query': query,
@@ -165,31 +219,26 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'count': len(results)
         }
         
-        print(f"✓ Found {len(results)} visually similar frames")
+        logger.info("✓ Found %d visually similar frames", len(results))
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps(output)
-        }
+        return success_response(event, output)
     
     except ValueError as e:
         # Input validation error
         error_msg = f"Invalid input: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.warning("❌ %s", error_msg)
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
     
     except Exception as e:
         # Unexpected error
         error_msg = f"Internal error: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
 
 
@@ -202,5 +251,5 @@ if __name__ == '__main__':
     }
     result = handler(test_event, None)
     print("\n=== Test Result ===")
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
 
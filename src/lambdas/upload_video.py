@@ -1,56 +1,112 @@
 """
 Video Upload Lambda
-Handles video file uploads to S3 and triggers processing pipeline.
+Handles video file uploads to S3.
 
 Accepts base64 encoded video files via API Gateway.
-After upload to S3, automatically triggers the processing pipeline.
+The raw bucket's .mp4 ObjectCreated notification starts process_video,
+so the processing pipeline needs no explicit trigger from here.
 
 Note: For YouTube videos, use a separate script to download first,
 then upload via this API. yt-dlp is too large to bundle in Lambda.
 """
 
-import json
+import io
+import logging
 import os
+import re
 import boto3
-import tempfile
+import orjson
 import base64
-from typing import Dict, Any
+from boto3.s3.transfer import TransferConfig
+from aws_config import client_config
+from filenames import sanitize_filename
+from typing import Dict, Any, BinaryIO
 from datetime import datetime
 
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
 # AWS clients
-s3 = boto3.client('s3')
-lambda_client = boto3.client('lambda')
+boto_config = client_config()
+s3 = boto3.client('s3', config=boto_config)
+
+# Multipart upload with parallel parts (videos are streamed from memory, no /tmp copy)
+upload_transfer_config = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True
+)
+
+# Base64 is decoded 4 MB (decoded) at a time while the upload reads it
+BASE64_CHUNK_CHARS = 4 * 1024 * 1024 // 3 * 4
+BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+WHITESPACE = re.compile(r'\s')
 
 # Environment variables
 VIDEOS_BUCKET = os.environ.get('VIDEOS_BUCKET')
-PROCESS_VIDEO_LAMBDA = os.environ.get('PROCESS_VIDEO_LAMBDA')
 
 
-def sanitize_filename(name: str) -> str:
+class Base64Reader(io.RawIOBase):
     """
-    Convert a title to a safe filename.
+    Read-only stream that decodes a base64 string chunk by chunk,
+    so the decoded video never has to be held in memory all at once.
     """
-    # Remove/replace unsafe characters
-    safe = name.replace(' ', '-').replace('/', '-').replace('\\', '-')
-    safe = ''.join(c for c in safe if c.isalnum() or c in '-_.')
-    # Limit length
-    return safe[:200]
+    
+    def __init__(self, data: str, chunk_chars: int = BASE64_CHUNK_CHARS):
+        self.data = data
+        self.chunk_chars = chunk_chars
+        self.position = 0
+        self.decoded = b''
+        self.offset = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        if self.offset >= len(self.decoded):
+            if self.position >= len(self.data):
+                return 0
+            chunk = self.data[self.position:self.position + self.chunk_chars]
+            self.position += len(chunk)
+            self.decoded = base64.b64decode(chunk)
+            self.offset = 0
+        
+        count = min(len(buffer), len(self.decoded) - self.offset)
+        buffer[:count] = self.decoded[self.offset:self.offset + count]
+        self.offset += count
+        return count
 
 
-def upload_to_s3(local_path: str, video_id: str) -> str:
+def prepare_base64(file_data: str) -> str:
+    """
+    Strip whitespace and validate base64 data up front, since decoding
+    happens in chunks during the upload. Raises ValueError if invalid.
     """
-    Upload video file to S3 raw videos bucket.
+    if WHITESPACE.search(file_data):
+        file_data = WHITESPACE.sub('', file_data)
+    if len(file_data) % 4 or not BASE64_PATTERN.fullmatch(file_data):
+        raise ValueError('data is not valid padded base64')
+    return file_data
+
+
+def decoded_size(file_data: str) -> int:
+    """Size in bytes of the decoded data for validated base64"""
+    return len(file_data) // 4 * 3 - file_data[-2:].count('=')
+
+
+def upload_to_s3(video_file: BinaryIO, file_size: int, video_id: str) -> str:
+    """
+    Upload video file object to S3 raw videos bucket.
     Returns the S3 key.
     """
     key = f"{video_id}.mp4"
     
-    print(f"  📤 Uploading to s3://{VIDEOS_BUCKET}/{key}")
-    
-    file_size = os.path.getsize(local_path)
+    logger.info("📤 Uploading to s3://%s/%s", VIDEOS_BUCKET, key)
     
-    # Upload with progress tracking for large files
-    s3.upload_file(
-        local_path,
+    # Multipart upload for large files
+    s3.upload_fileobj(
+        video_file,
         VIDEOS_BUCKET,
         key,
         ExtraArgs={
@@ -59,45 +115,15 @@ def upload_to_s3(local_path: str, video_id: str) -> str:
                 'uploaded_at': datetime.utcnow().isoformat(),
                 'uploaded_by': 'upload_video_lambda'
             }
-        }
+        },
+        Config=upload_transfer_config
     )
     
-    print(f"  ✅ Uploaded {file_size / 1024 / 1024:.2f} MB to S3")
+    logger.info("✅ Uploaded %.2f MB to S3", file_size / 1024 / 1024)
     
     return key
 
 
-def trigger_processing_pipeline(video_id: str) -> bool:
-    """
-    Trigger the process_video Lambda to start the processing pipeline.
-    """
-    print(f"  ⚙️  Triggering processing pipeline for {video_id}")
-    
-    try:
-        # Create a synthetic S3 event
-        event = {
-            'Records': [{
-                's3': {
-                    'bucket': {'name': VIDEOS_BUCKET},
-                    'object': {'key': f'{video_id}.mp4'}
-                }
-            }]
-        }
-        
-        response = lambda_client.invoke(
-            FunctionName=PROCESS_VIDEO_LAMBDA,
-            InvocationType='Event',  # Async invocation
-            Payload=json.dumps(event)
-        )
-        
-        print(f"  ✅ Processing pipeline triggered")
-        return True
-    
-    except Exception as e:
-        print(f"  ⚠️  Error triggering pipeline: {e}")
-        return False
-
-
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle video upload from multiple sources.
@@ -121,15 +147,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
         }
     """
-    print(f"=== upload_video Lambda invoked ===")
-    print(f"Event: {json.dumps(event, default=str)[:500]}")  # Truncate for large payloads
-    
-    temp_dir = None
+    logger.info("=== upload_video Lambda invoked ===")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", orjson.dumps(event, default=str).decode()[:500])  # Truncate for large payloads
     
     try:
         # Parse request body
         if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
+            body = orjson.loads(event['body'])
         else:
             body = event.get('body', {})
         
@@ -142,14 +167,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'file_name is required'})
+                'body': orjson.dumps({'error': 'file_name is required'}).decode()
             }
         
         if not file_data:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'file_data (base64 encoded) is required'})
+                'body': orjson.dumps({'error': 'file_data (base64 encoded) is required'}).decode()
             }
         
         # Auto-generate video_id from file_name
@@ -158,45 +183,35 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Use custom title or fallback to file_name without extension
         display_title = custom_title or os.path.splitext(file_name)[0]
         
-        print(f"\n📥 Uploading video: {video_id}")
-        print(f"   File name: {file_name}")
-        print(f"   Display title: {display_title}")
+        logger.info("📥 Uploading video: %s", video_id)
+        logger.info("File name: %s", file_name)
+        logger.info("Display title: %s", display_title)
         
-        # Create temp directory
-        temp_dir = tempfile.mkdtemp()
-        
-        # Decode base64 file data
+        # Validate base64 file data (decoded while uploading)
         try:
-            file_bytes = base64.b64decode(file_data)
-        except Exception as e:
+            file_data = prepare_base64(file_data)
+        except ValueError as e:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': f'Invalid base64 data: {str(e)}'})
+                'body': orjson.dumps({'error': f'Invalid base64 data: {str(e)}'}).decode()
             }
         
-        # Save to temp file
-        local_video_path = os.path.join(temp_dir, f'{video_id}.mp4')
-        with open(local_video_path, 'wb') as f:
-            f.write(file_bytes)
-        
         video_metadata = {
             'title': file_name,
-            'size_bytes': len(file_bytes)
+            'size_bytes': decoded_size(file_data)
         }
         
-        print(f"  ✅ Decoded file: {len(file_bytes) / 1024 / 1024:.2f} MB")
+        logger.info("✅ Validated file: %.2f MB", video_metadata['size_bytes'] / 1024 / 1024)
         
-        # Upload to S3
-        s3_key = upload_to_s3(local_video_path, video_id)
-        
-        # Trigger processing pipeline
-        pipeline_triggered = trigger_processing_pipeline(video_id)
+        # Upload to S3 (BufferedReader fills each multipart part completely)
+        video_file = io.BufferedReader(Base64Reader(file_data), buffer_size=BASE64_CHUNK_CHARS // 4 * 3)
+        s3_key = upload_to_s3(video_file, video_metadata['size_bytes'], video_id)
         
         response_body = {
             'message': 'Video uploaded successfully',
             'video_id': video_id,
-            'status': 'processing' if pipeline_triggered else 'uploaded',
+            'status': 'processing',
             's3_key': s3_key,
             'metadata': {
                 'title': display_title,
@@ -205,8 +220,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
         }
         
-        print(f"\n✅ Video uploaded: {video_id}")
-        print(f"Response: {json.dumps(response_body, indent=2)}")
+        logger.info("✅ Video uploaded: %s", video_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response: %s", orjson.dumps(response_body).decode())
         
         return {
             'statusCode': 200,
@@ -214,14 +230,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps(response_body)
+            'body': orjson.dumps(response_body).decode()
         }
     
     except Exception as e:
         error_msg = f"Error uploading video: {str(e)}"
-        print(f"❌ {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ %s", error_msg)
         
         return {
             'statusCode': 500,
@@ -229,27 +243,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': error_msg})
+            'body': orjson.dumps({'error': error_msg}).decode()
         }
-    
-    finally:
-        # Cleanup temp directory
-        if temp_dir and os.path.exists(temp_dir):
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 # For local testing
 if __name__ == '__main__':
     # Example with a small test file (you'd need to provide actual base64 data)
     test_event = {
-        'body': json.dumps({
+        'body': orjson.dumps({
             'file_name': 'Test Video.mp4',
             'file_data': 'VGVzdCBkYXRh',  # Base64 for "Test data"
             'title': 'My Custom Title'
-        })
+        }).decode()
     }
     result = handler(test_event, None)
     print("\n=== Test Result ===")
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
 